@@ -0,0 +1,32 @@
+"""Gunicorn settings for running the API with several worker processes.
+
+    cd backend && gunicorn -c gunicorn.conf.py server:app
+
+Every worker is a separate process with its own MongoDB pool, caches and live
+clients. Set CHANGE_BUS_BACKEND=redis (and usually ENTITY_CACHE_BACKEND=redis) so
+that changes made in one worker reach the others.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8001')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'uvicorn.workers.UvicornWorker'
+# Seconds a worker may stop heartbeating before it is restarted
+timeout = int(os.environ.get('WORKER_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+# Workers inherit the environment, so this lets each one size its share of MONGO_POOL_BUDGET
+os.environ['WEB_CONCURRENCY'] = str(workers)
+
+if workers > 1 and os.environ.get('CHANGE_BUS_BACKEND', 'local') == 'local':
+    print("Warning: running several workers with CHANGE_BUS_BACKEND=local; "
+          "caches and live updates will not be shared between them")
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of a dead worker from the aggregated /metrics output
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
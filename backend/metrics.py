@@ -0,0 +1,169 @@
+"""Prometheus metrics for the API: request latency per route, MongoDB command
+latency per collection and operation, connection pool gauges and cache lookups.
+
+Request latency is measured up to the response headers, so long-lived streams
+such as the event feed do not show up as multi-minute requests.
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory so that /metrics aggregates the values of all workers.
+"""
+import os
+import time
+
+from pymongo import monitoring
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ["method"], multiprocess_mode="livesum"
+)
+
+DB_COMMAND_LATENCY = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command",
+    ["collection", "command"], buckets=LATENCY_BUCKETS
+)
+DB_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error", ["collection", "command"]
+)
+
+POOL_MAX_SIZE = Gauge(
+    "mongodb_pool_max_size", "Configured maximum connections per server", multiprocess_mode="livesum"
+)
+POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections", "Open pooled connections", ["address"], multiprocess_mode="livesum"
+)
+POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out_connections", "Pooled connections in use by an operation", ["address"],
+    multiprocess_mode="livesum"
+)
+POOL_WAITING = Gauge(
+    "mongodb_pool_wait_queue_size", "Operations waiting for a pooled connection", ["address"],
+    multiprocess_mode="livesum"
+)
+POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total", "Failed connection checkouts, e.g. wait queue timeouts",
+    ["address", "reason"]
+)
+
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"])
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Times every command the driver sends. Callbacks run on Motor's executor threads."""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def _finished(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        DB_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        return collection
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        collection = self._finished(event)
+        DB_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Tracks connection pool occupancy and the operations queued for a connection."""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.labels(_address(event)).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.labels(_address(event)).dec()
+
+    def connection_check_out_started(self, event):
+        POOL_WAITING.labels(_address(event)).inc()
+
+    def connection_check_out_failed(self, event):
+        POOL_WAITING.labels(_address(event)).dec()
+        POOL_CHECKOUT_FAILURES.labels(_address(event), event.reason).inc()
+
+    def connection_checked_out(self, event):
+        address = _address(event)
+        POOL_WAITING.labels(address).dec()
+        POOL_CHECKED_OUT.labels(address).inc()
+
+    def connection_checked_in(self, event):
+        POOL_CHECKED_OUT.labels(_address(event)).dec()
+
+
+class RequestMetricsMiddleware:
+    """Records latency per route template, so /api/tools/{tool_id} is one series."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        start = time.perf_counter()
+        headers_sent = None
+
+        async def send_with_status(message):
+            nonlocal status, headers_sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers_sent = time.perf_counter()
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+            # Set on the scope by the router once a route matched
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method, route.path if route is not None else "unmatched", str(status)
+            ).observe((headers_sent or time.perf_counter()) - start)
+
+
+def render_metrics():
+    """Return (body, content type) for a Prometheus scrape."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
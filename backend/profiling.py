@@ -0,0 +1,257 @@
+"""Slow-request tracing and on-demand stack sampling.
+
+Every request gets a RequestTrace in a context variable. Motor runs driver calls
+on executor threads with a copy of the caller's context, so the command listener
+below can attribute each MongoDB command to the request that issued it. Requests
+slower than the threshold are logged with their route, commands, and the wall
+time spent waiting on MongoDB versus running Python.
+
+The StackSampler is armed through the admin API for the next N requests to one
+route. It samples the event loop thread only while one of those requests is
+running, and keeps only the frames below that request's middleware frame.
+
+Requests are timed up to their response headers, so streamed bodies (the event
+feed, exports, image ranges) are not counted as slow for as long as they stay open.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import List, Optional
+
+from pymongo import monitoring
+from starlette.routing import Match
+
+logger = logging.getLogger(__name__)
+
+# Commands kept per trace; N+1 request paths can issue thousands
+MAX_TRACED_COMMANDS = 100
+
+
+class RequestTrace:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = None
+        self.start = time.perf_counter()
+        self.commands = []  # (collection, command, start, end)
+        self.command_count = 0
+        self._pending = {}
+
+    def command_started(self, key, collection: str, command: str):
+        self._pending[key] = (collection, command, time.perf_counter())
+
+    def command_finished(self, key, failed: bool):
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        self.command_count += 1
+        if len(self.commands) < MAX_TRACED_COMMANDS:
+            collection, command, start = pending
+            self.commands.append((collection, command + (" (failed)" if failed else ""), start, time.perf_counter()))
+
+    def mongo_seconds(self, until: float) -> float:
+        """Wall time up to `until` with at least one command in flight, so concurrent commands count once."""
+        total, covered_until = 0.0, None
+        for _, _, start, end in sorted(self.commands, key=lambda command: command[2]):
+            end = min(end, until)
+            if covered_until is not None and start < covered_until:
+                start = covered_until
+            if end > start:
+                total += end - start
+                covered_until = end
+        return total
+
+    def summary(self, status: int, elapsed: float) -> dict:
+        mongo = self.mongo_seconds(self.start + elapsed)
+        return {
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": status,
+            "at": time.time(),
+            "total_ms": round(elapsed * 1000, 1),
+            "mongo_ms": round(mongo * 1000, 1),
+            "python_ms": round((elapsed - mongo) * 1000, 1),
+            "command_count": self.command_count,
+            "commands": [
+                {
+                    "collection": collection,
+                    "command": command,
+                    "offset_ms": round((start - self.start) * 1000, 1),
+                    "duration_ms": round((end - start) * 1000, 2),
+                }
+                for collection, command, start, end in self.commands
+            ],
+        }
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+class TraceCommandListener(monitoring.CommandListener):
+    """Adds each MongoDB command to the trace of the request that sent it."""
+
+    def started(self, event):
+        trace = current_trace.get()
+        if trace is not None:
+            target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+            trace.command_started(
+                (event.connection_id, event.request_id), target if isinstance(target, str) else "",
+                event.command_name
+            )
+
+    def succeeded(self, event):
+        trace = current_trace.get()
+        if trace is not None:
+            trace.command_finished((event.connection_id, event.request_id), False)
+
+    def failed(self, event):
+        trace = current_trace.get()
+        if trace is not None:
+            trace.command_finished((event.connection_id, event.request_id), True)
+
+
+class StackSampler:
+    """Samples the event loop thread while armed requests run and collapses the stacks."""
+
+    def __init__(self, route: str, requests: int, interval: float):
+        self.route = route
+        self.requests = requests
+        self.interval = interval
+        self.started = 0
+        self.finished = 0
+        self.samples = Counter()
+        self.done = asyncio.Event()
+        self._loop_thread_id = threading.get_ident()
+        self._active_frames = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def claim(self) -> bool:
+        """Reserve a slot for a request to the armed route, if any are left."""
+        if self.started >= self.requests:
+            return False
+        self.started += 1
+        return True
+
+    def enter(self, frame):
+        with self._lock:
+            self._active_frames.add(frame)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    def exit(self, frame):
+        with self._lock:
+            self._active_frames.discard(frame)
+        self.finished += 1
+        if self.finished >= self.requests:
+            self.done.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active_frames:
+                    return
+                active = set(self._active_frames)
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = []
+            while frame is not None:
+                if frame in active:
+                    self.samples[";".join(reversed(stack))] += 1
+                    break
+                code = frame.f_code
+                if code.co_filename == __file__:
+                    break  # the profiler's own bookkeeping, not the request
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            del frame
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common() if stack)
+
+
+class RequestProfiler:
+    """Holds the slow request log and the currently armed sampler, if any."""
+
+    def __init__(self, threshold: float, log_size: int):
+        self.threshold = threshold
+        self.slow_requests = deque(maxlen=log_size)
+        self.sampler: Optional[StackSampler] = None
+
+    def arm(self, route: str, requests: int, interval: float) -> StackSampler:
+        if self.sampler is not None:
+            raise RuntimeError(f"Already profiling {self.sampler.route}")
+        self.sampler = StackSampler(route, requests, interval)
+        return self.sampler
+
+    def disarm(self):
+        self.sampler = None
+
+    def record(self, trace: RequestTrace, status: int, elapsed: float):
+        summary = trace.summary(status, elapsed)
+        self.slow_requests.append(summary)
+        logger.warning(
+            f"Slow request {trace.method} {trace.route or trace.path} -> {status}: {summary['total_ms']}ms "
+            f"({summary['mongo_ms']}ms MongoDB over {trace.command_count} commands, {summary['python_ms']}ms Python)"
+        )
+
+    def recent(self, limit: int) -> List[dict]:
+        return list(self.slow_requests)[-limit:][::-1]
+
+
+def _route_path(scope) -> Optional[str]:
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+class ProfilingMiddleware:
+    """Traces every request and feeds slow ones and armed ones to the RequestProfiler."""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = current_trace.set(trace)
+        status = 500
+        headers_sent = None
+
+        async def send_with_status(message):
+            nonlocal status, headers_sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers_sent = time.perf_counter()
+            await send(message)
+
+        sampler = self.profiler.sampler
+        if sampler is not None and not (_route_path(scope) == sampler.route and sampler.claim()):
+            sampler = None
+        frame = sys._getframe()
+        if sampler is not None:
+            sampler.enter(frame)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if sampler is not None:
+                sampler.exit(frame)
+            del frame
+            current_trace.reset(token)
+            elapsed = (headers_sent or time.perf_counter()) - trace.start
+            if elapsed >= self.profiler.threshold:
+                route = scope.get("route")
+                trace.route = route.path if route is not None else None
+                self.profiler.record(trace, status, elapsed)
@@ -1,29 +1,173 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Query, Request, Response, Depends, BackgroundTasks
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure
 import os
+import time
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from pydantic_core import to_json
+import bson
+import re
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from metrics import (
+    CACHE_REQUESTS, POOL_MAX_SIZE, CommandMetricsListener, PoolMetricsListener, RequestMetricsMiddleware,
+    render_metrics
+)
+from profiling import ProfilingMiddleware, RequestProfiler, TraceCommandListener
+import reporting
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Optional: only needed for ENTITY_CACHE_BACKEND=redis
+    aioredis = None
+from typing import Dict, List, Optional
+from collections import OrderedDict
 import uuid
-from datetime import datetime, date
+from datetime import datetime, date, time as dt_time, timedelta
 from enum import Enum
+from functools import lru_cache
+import heapq
+import bisect
 import shutil
 import json
+import base64
+import hashlib
+import csv
+import io
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Server processes running this app (set by gunicorn/uvicorn --workers) and the
+# MongoDB connections they may hold in total; each process gets an equal share
+# unless MONGO_MAX_POOL_SIZE sets the per-process pool size directly
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+MONGO_POOL_BUDGET = int(os.environ.get('MONGO_POOL_BUDGET', '100'))
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE') or max(1, MONGO_POOL_BUDGET // WEB_CONCURRENCY))
+
+# Connections kept open per process, and how many are opened on startup
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get('MONGO_WARMUP_CONNECTIONS') or MONGO_MIN_POOL_SIZE)
+
+# Milliseconds a request waits for a free pooled connection, and for a usable server,
+# before failing with 503 instead of queueing indefinitely
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '30000'))
+
+# Comma-separated wire compressors, e.g. "zstd,zlib" (zstd and snappy need extra packages)
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')
+
+# primary, primaryPreferred, secondary, secondaryPreferred or nearest. Anything but
+# primary lets reads, including the ETag version counters, lag behind recent writes.
+MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_options = {
+    "maxPoolSize": MONGO_MAX_POOL_SIZE,
+    "minPoolSize": min(MONGO_MIN_POOL_SIZE, MONGO_MAX_POOL_SIZE),
+    "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    "readPreference": MONGO_READ_PREFERENCE,
+}
+if MONGO_COMPRESSORS:
+    mongo_options["compressors"] = MONGO_COMPRESSORS
+client = AsyncIOMotorClient(
+    mongo_url, event_listeners=[CommandMetricsListener(), PoolMetricsListener(), TraceCommandListener()],
+    **mongo_options
+)
+POOL_MAX_SIZE.set(MONGO_MAX_POOL_SIZE)
 db = client[os.environ['DB_NAME']]
 
+# Rows validated and written per insert_many during bulk tool imports
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '1000'))
+
+# Seconds between scans that flag checkouts past their expected return as overdue
+OVERDUE_SCAN_INTERVAL = float(os.environ.get('OVERDUE_SCAN_INTERVAL', '300'))
+
+# Seconds between scans that move tools past their calibration date to needs_calibration
+CALIBRATION_SCAN_INTERVAL = float(os.environ.get('CALIBRATION_SCAN_INTERVAL', '3600'))
+
+# Returned checkouts older than this many days move from checkout_records to monthly
+# archive collections; archive months older than the retention are dropped (0 keeps them)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_RETENTION_MONTHS = int(os.environ.get('ARCHIVE_RETENTION_MONTHS', '0'))
+ARCHIVE_SCAN_INTERVAL = float(os.environ.get('ARCHIVE_SCAN_INTERVAL', '21600'))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
+
+# Seconds between catch-up runs that fold returned checkouts missed by the return
+# handlers (or returned before rollups existed) into the daily analytics rollups
+ROLLUP_SCAN_INTERVAL = float(os.environ.get('ROLLUP_SCAN_INTERVAL', '86400'))
+
+# Seconds after which a rollup batch that was claimed but never finished is retried
+ROLLUP_CLAIM_TIMEOUT = float(os.environ.get('ROLLUP_CLAIM_TIMEOUT', '600'))
+
+# The periodic scans above run in one server process at a time, the holder of a lease in
+# MongoDB; seconds after which the lease of a process that stopped renewing it is taken over
+JOB_LEASE_TTL = float(os.environ.get('JOB_LEASE_TTL', '60'))
+
+# Seconds a computed dashboard snapshot is served before it is recomputed
+DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', '5'))
+
+# Read-through cache of tools, projects and workers by id: "local" (per process) or "redis"
+ENTITY_CACHE_BACKEND = os.environ.get('ENTITY_CACHE_BACKEND', 'local')
+ENTITY_CACHE_SIZE = int(os.environ.get('ENTITY_CACHE_SIZE', '10000'))
+ENTITY_CACHE_TTL = float(os.environ.get('ENTITY_CACHE_TTL', '300'))
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+# How change events reach the other server processes: "local" (single process) or "redis"
+CHANGE_BUS_BACKEND = os.environ.get('CHANGE_BUS_BACKEND', 'local')
+CHANGE_BUS_CHANNEL = os.environ.get('CHANGE_BUS_CHANNEL', 'qherramientas:changes')
+
+# Seconds a process reuses the collection version counters behind ETags. Change events
+# drop them at once, so this only bounds how late a process sees changes made by
+# others that it is not told about, i.e. several workers without the Redis bus
+COLLECTION_VERSION_TTL = float(os.environ.get(
+    'COLLECTION_VERSION_TTL', '300' if CHANGE_BUS_BACKEND == 'redis' or WEB_CONCURRENCY == 1 else '1'
+))
+
+# Seconds the planner's in-memory reservation index is trusted before a query reloads it
+# (0: never). Change events keep it current, so like COLLECTION_VERSION_TTL this only
+# matters for several workers without the Redis bus
+RESERVATION_INDEX_TTL = float(os.environ.get(
+    'RESERVATION_INDEX_TTL', '0' if CHANGE_BUS_BACKEND == 'redis' or WEB_CONCURRENCY == 1 else '5'
+))
+
+# Seconds to coalesce mutations before pushing fresh dashboard counters to live clients
+DASHBOARD_PUSH_DELAY = float(os.environ.get('DASHBOARD_PUSH_DELAY', '0.5'))
+
+# Requests slower than this many milliseconds are logged with their MongoDB commands
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '500'))
+SLOW_REQUEST_LOG_SIZE = int(os.environ.get('SLOW_REQUEST_LOG_SIZE', '100'))
+
+# Tool images: where they are stored, the largest accepted upload, the chunk size used to
+# copy uploads to disk, and the bounding boxes (pixels) of the generated thumbnails
+IMAGE_STORAGE_DIR = Path(os.environ.get('IMAGE_STORAGE_DIR', str(ROOT_DIR / 'uploads' / 'tools')))
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', str(20 * 1024 * 1024)))
+IMAGE_UPLOAD_CHUNK_SIZE = int(os.environ.get('IMAGE_UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+IMAGE_THUMBNAIL_SIZE = int(os.environ.get('IMAGE_THUMBNAIL_SIZE', '256'))
+IMAGE_PREVIEW_SIZE = int(os.environ.get('IMAGE_PREVIEW_SIZE', '1024'))
+
+# Threads that write uploads and resize images, off the event loop
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+
+# Seconds between keep-alive comments on idle event streams
+EVENT_STREAM_KEEPALIVE = float(os.environ.get('EVENT_STREAM_KEEPALIVE', '15'))
+
 # Create the main app without a prefix
 app = FastAPI()
 
+request_profiler = RequestProfiler(SLOW_REQUEST_THRESHOLD_MS / 1000, SLOW_REQUEST_LOG_SIZE)
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -47,6 +191,19 @@ class CheckoutStatus(str, Enum):
     RETURNED = "returned"
     OVERDUE = "overdue"
 
+class ToolSortField(str, Enum):
+    CREATED_AT = "created_at"
+    NAME = "name"
+
+class DataFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class ReportFormat(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+    JSON = "json"
+
 # Data Models
 class Tool(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -56,6 +213,7 @@ class Tool(BaseModel):
     serial_number: Optional[str] = None
     status: ToolStatus = ToolStatus.AVAILABLE
     image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
     calibration_due: Optional[date] = None
     location: Optional[str] = "Storage"
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -123,6 +281,102 @@ class ReturnTool(BaseModel):
     checkout_id: str
     notes: Optional[str] = None
 
+class BulkCheckoutCreate(BaseModel):
+    items: List[CheckoutCreate]
+
+class ProjectCheckoutCreate(BaseModel):
+    worker_id: str
+    expected_return: Optional[date] = None
+    notes: Optional[str] = None
+
+class BulkReturnTool(BaseModel):
+    checkout_ids: List[str]
+    notes: Optional[str] = None
+
+class BulkItemResult(BaseModel):
+    tool_id: Optional[str] = None
+    checkout_id: Optional[str] = None
+    success: bool
+    detail: Optional[str] = None
+    checkout: Optional[CheckoutRecord] = None
+
+class BulkOperationResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class ToolImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[dict]
+
+class ToolUtilization(BaseModel):
+    tool_id: str
+    tool_name: Optional[str] = None
+    category: Optional[str] = None
+    hours_out: float
+    utilization: float
+    returns: int
+    mean_duration_hours: Optional[float] = None
+
+class CategoryUtilization(BaseModel):
+    category: str
+    tools: int
+    hours_out: float
+    utilization: float
+    returns: int
+    mean_duration_hours: Optional[float] = None
+
+class Borrower(BaseModel):
+    worker_id: str
+    worker_name: Optional[str] = None
+    checkouts: int
+    hours_out: float
+
+class DepartmentUsage(BaseModel):
+    department: str
+    checkouts: int
+    hours_out: float
+    top_borrowers: List[Borrower]
+
+class AnalyticsReport(BaseModel):
+    date_from: date
+    date_to: date
+    outstanding_checkouts: int
+    categories: List[CategoryUtilization]
+    top_tools: List[ToolUtilization]
+    departments: List[DepartmentUsage]
+
+class Reservation(BaseModel):
+    kind: str  # "checkout" or "project"
+    id: str
+    tool_id: str
+    project_id: Optional[str] = None
+    start: datetime
+    end: Optional[datetime] = None  # None: open-ended, e.g. a checkout past its expected return
+
+class ToolConflict(BaseModel):
+    tool_id: str
+    reservations: List[Reservation]
+
+class ConflictQuery(BaseModel):
+    tool_ids: List[str] = Field(..., max_length=1000)
+    start_date: date
+    end_date: Optional[date] = None
+    exclude_project_id: Optional[str] = None
+
+class ConflictReport(BaseModel):
+    start_date: date
+    end_date: Optional[date] = None
+    conflicts: List[ToolConflict]
+    available: List[str]
+
+class ActiveCheckout(BaseModel):
+    checkout: CheckoutRecord
+    tool: Optional[Tool] = None
+    project: Optional[Project] = None
+    worker: Optional[Worker] = None
+
 # Dashboard Stats Model
 class DashboardStats(BaseModel):
     total_tools: int
@@ -133,41 +387,879 @@ class DashboardStats(BaseModel):
     total_workers: int
     recent_checkouts: List[dict]
 
+# Document codec: values are stored as native BSON types so that range queries and
+# sorts compare dates rather than strings. BSON has no date type, so dates are stored
+# as datetimes at midnight; the models convert them back to dates when reading.
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, dt_time.min)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode_value(v) for v in value]
+    return value
+
+def _to_document(data) -> dict:
+    """Convert a model (or a dict of field values) into a MongoDB document."""
+    if isinstance(data, BaseModel):
+        data = data.dict()
+    return _encode_value(data)
+
+@lru_cache(maxsize=None)
+def _date_fields(model) -> frozenset:
+    return frozenset(name for name, field in model.model_fields.items()
+                     if field.annotation in (date, Optional[date]))
+
+def _decode_partial(model, doc: dict) -> dict:
+    # Partial (projected) documents skip model validation, so turn stored dates back into dates here
+    for name in _date_fields(model) & doc.keys():
+        if isinstance(doc[name], datetime):
+            doc[name] = doc[name].date()
+    return doc
+
+# Fields that older versions of the API stored as ISO strings, per collection
+DATE_FIELDS = {
+    "tools": ["calibration_due", "created_at", "updated_at"],
+    "projects": ["start_date", "end_date", "created_at", "updated_at"],
+    "workers": ["created_at"],
+    "checkout_records": ["checkout_date", "expected_return", "actual_return"],
+}
+
+async def migrate_date_fields(batch_size: int = 1000) -> dict:
+    """One-off migration converting ISO string date fields to native BSON datetimes."""
+    migrated = {}
+    for collection_name, fields in DATE_FIELDS.items():
+        collection = db[collection_name]
+        query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        projection = {"_id": 1, **{field: 1 for field in fields}}
+        count = 0
+        operations = []
+        async for doc in collection.find(query, projection):
+            update = {}
+            for field in fields:
+                value = doc.get(field)
+                if isinstance(value, str):
+                    try:
+                        update[field] = datetime.fromisoformat(value)
+                    except ValueError:
+                        logger.warning(f"Skipping unparseable {collection_name}.{field} value {value!r}")
+            if update:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                count += len(operations)
+                operations = []
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            count += len(operations)
+        migrated[collection_name] = count
+    return migrated
+
+class SnapshotCache:
+    """Holds one computed value for a short TTL; mutations call invalidate() to drop it early."""
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+    
+    def _fresh(self) -> bool:
+        return self._value is not None and time.monotonic() < self._expires_at
+    
+    async def get(self, compute):
+        if self._fresh():
+            CACHE_REQUESTS.labels(self.name, "hit").inc()
+            return self._value
+        # Let a single caller recompute while concurrent pollers wait for its result
+        async with self._lock:
+            if self._fresh():
+                CACHE_REQUESTS.labels(self.name, "hit").inc()
+                return self._value
+            CACHE_REQUESTS.labels(self.name, "miss").inc()
+            generation = self._generation
+            value = await compute()
+            # Don't keep a snapshot that was invalidated while it was being computed
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+            return value
+    
+    def invalidate(self):
+        self._generation += 1
+        self._value = None
+
+dashboard_cache = SnapshotCache("dashboard", DASHBOARD_CACHE_TTL)
+
+class LocalCacheBackend:
+    """In-process LRU cache with a per-entry TTL."""
+    name = "local"
+    shared = False
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, document)
+        self._generations = {}  # collection -> invalidations so far
+    
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, doc = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return dict(doc)
+    
+    async def version(self, key: str):
+        return self._generations.get(key.split(":", 1)[0], 0)
+    
+    async def set(self, key: str, doc: dict, version):
+        """Store a document unless its collection was invalidated since `version` was read."""
+        if version != await self.version(key):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, dict(doc))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def _bump(self, collection: str):
+        self._generations[collection] = self._generations.get(collection, 0) + 1
+    
+    async def delete(self, keys: List[str]):
+        for key in keys:
+            self._bump(key.split(":", 1)[0])
+            self._entries.pop(key, None)
+    
+    async def clear(self, prefix: str):
+        self._bump(prefix.rstrip(":"))
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+    
+    async def size(self) -> int:
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """Redis-backed cache shared by all server processes.
+
+    Documents are stored BSON-encoded so dates round-trip unchanged. Size is bounded
+    by the Redis maxmemory policy (e.g. allkeys-lru) rather than by this class.
+    Invalidations increment a version counter per key and per collection, and a
+    document read before one is only stored if both counters are unchanged.
+    """
+    name = "redis"
+    shared = True
+    
+    # KEYS: entry, key version, collection version; ARGV: document, ttl ms, key version, collection version
+    SET_IF_CURRENT = """
+    if (redis.call('get', KEYS[2]) or '') == ARGV[3] and (redis.call('get', KEYS[3]) or '') == ARGV[4] then
+        redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    end
+    """
+    
+    def __init__(self, url: str, ttl: float, namespace: str = "qherramientas:entity:"):
+        if aioredis is None:
+            raise RuntimeError("ENTITY_CACHE_BACKEND=redis requires the redis package")
+        self.redis = aioredis.from_url(url)
+        self.ttl = ttl
+        self.namespace = namespace
+        self._set_if_current = self.redis.register_script(self.SET_IF_CURRENT)
+    
+    def _version_keys(self, key: str) -> List[str]:
+        return [f"{self.namespace}version:{key}", f"{self.namespace}version:{key.split(':', 1)[0]}"]
+    
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.redis.get(self.namespace + key)
+        return bson.decode(raw) if raw is not None else None
+    
+    async def version(self, key: str):
+        return [(value or b"").decode() for value in await self.redis.mget(self._version_keys(key))]
+    
+    async def set(self, key: str, doc: dict, version):
+        """Store a document unless it was invalidated since `version` was read."""
+        await self._set_if_current(
+            keys=[self.namespace + key, *self._version_keys(key)],
+            args=[bson.encode(doc), int(self.ttl * 1000), *version]
+        )
+    
+    async def delete(self, keys: List[str]):
+        if keys:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    # Only needs to outlive reads that started before it; those take far less than the TTL
+                    version_key = self._version_keys(key)[0]
+                    pipe.incr(version_key)
+                    pipe.pexpire(version_key, int(self.ttl * 1000))
+                pipe.unlink(*(self.namespace + key for key in keys))
+                await pipe.execute()
+    
+    async def clear(self, prefix: str):
+        await self.redis.incr(f"{self.namespace}version:{prefix.rstrip(':')}")
+        batch = []
+        async for key in self.redis.scan_iter(match=f"{self.namespace}{prefix}*", count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                await self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            await self.redis.unlink(*batch)
+    
+    async def size(self) -> int:
+        count = 0
+        version_prefix = f"{self.namespace}version:".encode()
+        async for key in self.redis.scan_iter(match=f"{self.namespace}*", count=1000):
+            if not key.startswith(version_prefix):
+                count += 1
+        return count
+
+class EntityCache:
+    """Read-through cache of documents by id, invalidated by the mutation handlers."""
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+    
+    async def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        key = f"{collection}:{doc_id}"
+        doc = await self.backend.get(key)
+        if doc is not None:
+            self.hits += 1
+            CACHE_REQUESTS.labels(collection, "hit").inc()
+            return doc
+        self.misses += 1
+        CACHE_REQUESTS.labels(collection, "miss").inc()
+        # Read before the document, so an invalidation racing this read keeps it out of the cache
+        version = await self.backend.version(key)
+        doc = await db[collection].find_one({"id": doc_id}, {"_id": 0})
+        if doc is not None:
+            await self.backend.set(key, doc, version)
+        return doc
+    
+    async def invalidate(self, collection: str, doc_ids: List[str]):
+        await self.backend.delete([f"{collection}:{doc_id}" for doc_id in doc_ids])
+    
+    async def invalidate_collection(self, collection: str):
+        await self.backend.clear(f"{collection}:")
+    
+    async def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "size": await self.backend.size()
+        }
+
+if ENTITY_CACHE_BACKEND == "redis":
+    entity_cache = EntityCache(RedisCacheBackend(REDIS_URL, ENTITY_CACHE_TTL))
+else:
+    entity_cache = EntityCache(LocalCacheBackend(ENTITY_CACHE_SIZE, ENTITY_CACHE_TTL))
+
+# Collections served through entity_cache
+CACHED_COLLECTIONS = {"tools", "projects", "workers"}
+
+class ChangeFeed:
+    """Fans change events out to connected Server-Sent Events clients.
+
+    Each event is serialized once and queued for every subscriber. A client that
+    falls behind has its backlog replaced by a single resync event.
+    """
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._sequence = 0
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+    
+    def _message(self, event: str, payload: bytes) -> str:
+        self._sequence += 1
+        return f"id: {self._sequence}\nevent: {event}\ndata: {payload.decode()}\n\n"
+    
+    def publish(self, event: str, data):
+        if not self._subscribers:
+            return
+        message = self._message(event, data if isinstance(data, bytes) else to_json(data))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._message("resync", to_json({"collections": ["all"]})))
+
+change_feed = ChangeFeed()
+_dashboard_push: Optional[asyncio.Task] = None
+
+async def _push_dashboard():
+    global _dashboard_push
+    await asyncio.sleep(DASHBOARD_PUSH_DELAY)
+    _dashboard_push = None
+    change_feed.publish("dashboard", await dashboard_cache.get(_compute_dashboard))
+
+# Collections whose contents each kind of change event touches
+CHANGE_COLLECTIONS = {
+    "tool": ["tools"],
+    "project": ["projects"],
+    "worker": ["workers"],
+    "checkout": ["checkout_records", "tools"],
+}
+RESYNC_COLLECTIONS = {
+    "tools": ["tools"],
+    "checkouts": ["checkout_records"],
+    "all": ["tools", "projects", "workers", "checkout_records"],
+}
+
+def _changed_collections(event: str, data) -> List[str]:
+    if event == "resync":
+        return sorted({name for alias in data["collections"] for name in RESYNC_COLLECTIONS[alias]})
+    return CHANGE_COLLECTIONS[event.split(".")[0]]
+
+async def _invalidate_entities(event: str, data, collections: List[str]):
+    if event == "resync":
+        for collection in CACHED_COLLECTIONS.intersection(collections):
+            await entity_cache.invalidate_collection(collection)
+    elif event.startswith("checkout."):
+        # Checkouts and returns flip the status of the tools involved
+        await entity_cache.invalidate("tools", [
+            checkout.tool_id if isinstance(checkout, BaseModel) else checkout["tool_id"]
+            for checkout in data["checkouts"]
+        ])
+    elif not event.endswith(".created"):
+        doc_id = data.id if isinstance(data, BaseModel) else data["id"]
+        await entity_cache.invalidate(collections[0], [doc_id])
+
+async def _apply_change(event: str, data, collections: List[str], shared_done: bool = False):
+    """Drop this process's cached state for a change and push it to its live clients.
+
+    shared_done skips caches shared between processes, which the originating
+    process has already invalidated.
+    """
+    global _dashboard_push
+    version_cache.invalidate(collections)
+    if not (shared_done and entity_cache.backend.shared):
+        await _invalidate_entities(event, data, collections)
+    reservation_index.apply(event, data)
+    dashboard_cache.invalidate()
+    change_feed.publish(event, data)
+    # Coalesce bursts of mutations into a single dashboard push
+    if change_feed.subscriber_count and _dashboard_push is None:
+        _dashboard_push = asyncio.create_task(_push_dashboard())
+
+async def _publish_change(event: str, data):
+    """Record a mutation once its writes are done.
+
+    Bumps the version counters behind conditional GETs, drops cached documents and
+    the dashboard snapshot, pushes the change to live clients and forwards it to
+    the other server processes.
+    """
+    collections = _changed_collections(event, data)
+    await _bump_versions(collections)
+    await _apply_change(event, data, collections)
+    await change_bus.publish(event, data)
+
+class LocalChangeBus:
+    """Change bus for a single server process: there is nobody to tell."""
+    name = "local"
+    
+    async def publish(self, event: str, data):
+        pass
+    
+    async def run(self):
+        pass
+
+class RedisChangeBus:
+    """Forwards change events between server processes over Redis pub/sub.
+
+    Messages carry the id of the sending process so that it skips its own. Pub/sub
+    does not buffer, so after a reconnect every cache in this process is treated
+    as stale and live clients are told to resync.
+    """
+    name = "redis"
+    
+    def __init__(self, url: str, channel: str):
+        if aioredis is None:
+            raise RuntimeError("CHANGE_BUS_BACKEND=redis requires the redis package")
+        self.redis = aioredis.from_url(url)
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+    
+    async def publish(self, event: str, data):
+        message = to_json({"origin": self.origin, "event": event, "data": data})
+        try:
+            await self.redis.publish(self.channel, message)
+        except Exception:
+            logger.exception(f"Failed to forward {event} to other processes")
+    
+    async def _listen(self, reconnect: bool):
+        async with self.redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(self.channel)
+            if reconnect:
+                # Changes published while disconnected were lost
+                data = {"collections": ["all"]}
+                await _apply_change("resync", data, _changed_collections("resync", data))
+            async for message in pubsub.listen():
+                payload = json.loads(message["data"])
+                if payload["origin"] == self.origin:
+                    continue
+                event, data = payload["event"], payload["data"]
+                await _apply_change(event, data, _changed_collections(event, data), shared_done=True)
+    
+    async def run(self):
+        reconnect = False
+        while True:
+            try:
+                await self._listen(reconnect)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change bus connection lost, reconnecting")
+                await asyncio.sleep(1)
+            reconnect = True
+
+if CHANGE_BUS_BACKEND == "redis":
+    change_bus = RedisChangeBus(REDIS_URL, CHANGE_BUS_CHANNEL)
+else:
+    change_bus = LocalChangeBus()
+
+# Conditional GET support. Every mutation increments a per-collection version
+# counter after its writes; responses carry an ETag derived from the versions of
+# the collections they read, so unchanged data is answered with 304 Not Modified
+# without loading any documents. The counters live in MongoDB so that they are
+# shared by all server processes and survive restarts; each process keeps a copy
+# that change events drop, so an unchanged collection costs no round trip.
+async def _bump_versions(collections: List[str]):
+    await db.collection_versions.bulk_write([
+        UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True) for name in collections
+    ], ordered=False)
+
+class VersionCache:
+    """This process's copy of the collection version counters."""
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._versions = {}  # collection -> (expires_at, version)
+        self._generation = 0
+    
+    async def get(self, collections) -> dict:
+        now = time.monotonic()
+        versions = {}
+        for name in collections:
+            entry = self._versions.get(name)
+            if entry is not None and now < entry[0]:
+                versions[name] = entry[1]
+        missing = [name for name in collections if name not in versions]
+        if missing:
+            generation = self._generation
+            docs = await db.collection_versions.find({"_id": {"$in": missing}}).to_list(None)
+            loaded = {doc["_id"]: doc["version"] for doc in docs}
+            for name in missing:
+                versions[name] = loaded.get(name, 0)
+                # Don't keep counters read while a change was being applied
+                if generation == self._generation:
+                    self._versions[name] = (time.monotonic() + self.ttl, versions[name])
+        return versions
+    
+    def invalidate(self, collections: List[str]):
+        self._generation += 1
+        for name in collections:
+            self._versions.pop(name, None)
+
+version_cache = VersionCache(COLLECTION_VERSION_TTL)
+
+async def _collection_etag(request: Request, collections, per_day: bool) -> str:
+    versions = await version_cache.get(collections)
+    key = "|".join([
+        request.url.path,
+        request.url.query,
+        *(f"{name}:{versions.get(name, 0)}" for name in collections),
+        datetime.utcnow().date().isoformat() if per_day else ""
+    ])
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _conditional_get(*collections: str, per_day: bool = False):
+    """Route dependency answering 304 when the client's If-None-Match is still current.
+
+    `per_day` is for responses that also depend on today's date.
+    """
+    async def check(request: Request):
+        etag = await _collection_etag(request, collections, per_day)
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        # Added to the response by ETagMiddleware, since most handlers return raw responses
+        request.state.etag = etag
+    return Depends(check)
+
+class ETagMiddleware:
+    """Sets the ETag computed by _conditional_get on successful responses."""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = scope.get("state", {}).get("etag")
+                if etag:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"etag", etag.encode()),
+                        (b"cache-control", b"no-cache"),
+                    ]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_etag)
+
+# Indexes required by the query paths below, ensured on startup
+REQUIRED_INDEXES = {
+    "tools": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        IndexModel([("name", ASCENDING), ("id", ASCENDING)], name="name_id"),
+        IndexModel([("category", ASCENDING)], name="category"),
+        IndexModel([("location", ASCENDING)], name="location"),
+        IndexModel([("calibration_due", ASCENDING), ("id", ASCENDING)], name="calibration_due_id"),
+        IndexModel([("status", ASCENDING), ("calibration_due", ASCENDING)], name="status_calibration_due"),
+        IndexModel([("name", "text"), ("serial_number", "text")], name="name_serial_number_text"),
+    ],
+    "projects": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "workers": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "checkout_records": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING)], name="status"),
+        # Also serves the ascending (checkout_date, id) keyset pagination by walking it backwards
+        IndexModel([("checkout_date", DESCENDING), ("id", DESCENDING)], name="checkout_date_desc"),
+        IndexModel([("tool_id", ASCENDING), ("status", ASCENDING)], name="tool_id_status"),
+        IndexModel([("status", ASCENDING), ("expected_return", ASCENDING)], name="status_expected_return"),
+        IndexModel([("status", ASCENDING), ("actual_return", ASCENDING)], name="status_actual_return"),
+        IndexModel([("status", ASCENDING), ("rollup_batch", ASCENDING)], name="status_rollup_batch"),
+        IndexModel([("status", ASCENDING), ("rolled_up", ASCENDING), ("rollup_claimed_at", ASCENDING)],
+                   name="status_rolled_up_claimed_at"),
+    ],
+    "tool_usage_daily": [
+        IndexModel([("day", ASCENDING), ("category", ASCENDING)], name="day_category"),
+    ],
+    "worker_usage_daily": [
+        IndexModel([("day", ASCENDING), ("department", ASCENDING)], name="day_department"),
+    ],
+}
+
+# Indexes of every monthly checkout archive collection, created with the collection
+ARCHIVE_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    IndexModel([("checkout_date", ASCENDING), ("id", ASCENDING)], name="checkout_date_id"),
+    IndexModel([("actual_return", ASCENDING)], name="actual_return"),
+    IndexModel([("tool_id", ASCENDING), ("checkout_date", ASCENDING)], name="tool_id_checkout_date"),
+    IndexModel([("worker_id", ASCENDING), ("checkout_date", ASCENDING)], name="worker_id_checkout_date"),
+]
+
+async def ensure_indexes():
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        try:
+            await db[collection_name].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. duplicate ids blocking a unique index; surfaced by /api/admin/indexes
+            logger.error(f"Failed to create indexes on {collection_name}: {e}")
+
+# Serialization fast path: documents are validated once, in bulk, and returned as
+# pre-serialized JSON so FastAPI doesn't validate them again against response_model
+@lru_cache(maxsize=None)
+def _type_adapter(tp) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+def _json_response(tp, content, headers: Optional[dict] = None) -> Response:
+    adapter = _type_adapter(tp)
+    return Response(adapter.dump_json(adapter.validate_python(content)), media_type="application/json", headers=headers)
+
+# Keyset pagination helpers
+def _encode_cursor(sort_value, doc_id: str) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = {"$date": sort_value.isoformat()}
+    raw = json.dumps([sort_value, doc_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["$date"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return sort_value, doc_id
+
+async def _ndjson_stream(cursor, model):
+    # Serialize documents one by one as the Motor cursor yields them
+    adapter = _type_adapter(model)
+    async for doc in cursor:
+        yield adapter.dump_json(adapter.validate_python(doc)) + b"\n"
+
+async def _ndjson_projected_stream(cursor, model, drop_fields):
+    async for doc in cursor:
+        for field in drop_fields:
+            doc.pop(field, None)
+        yield json.dumps(jsonable_encoder(_decode_partial(model, doc))) + "\n"
+
+async def _list_documents(collection, model, query: dict, sort_field: str,
+                         after: Optional[str], limit: Optional[int], stream: bool,
+                         fields: Optional[List[str]] = None):
+    """List documents ordered by (sort_field, id), resuming after an opaque keyset cursor.
+
+    Without a limit the whole result set is returned; with one, the cursor for the
+    next page is sent in the X-Next-Cursor header. In stream mode the documents are
+    written as NDJSON while the cursor is iterated instead of being collected first;
+    the headers are sent before the last document is known, so it takes no limit.
+    When `fields` is given only those fields are fetched and returned, unvalidated.
+    """
+    if stream and limit:
+        raise HTTPException(status_code=400, detail="stream cannot be combined with limit; page with limit and after instead")
+    if after:
+        sort_value, doc_id = _decode_cursor(after)
+        query = {"$and": [query, {"$or": [
+            {sort_field: {"$gt": sort_value}},
+            {sort_field: sort_value, "id": {"$gt": doc_id}}
+        ]}]}
+    
+    drop_fields = []
+    if fields:
+        # id and the sort field are always fetched to build the next cursor
+        projection = {"_id": 0, "id": 1, sort_field: 1, **{field: 1 for field in fields}}
+        drop_fields = [field for field in ("id", sort_field) if field not in fields]
+    else:
+        projection = {"_id": 0}
+    
+    cursor = collection.find(query, projection).sort([(sort_field, 1), ("id", 1)])
+    if limit:
+        cursor = cursor.limit(limit)
+    
+    if stream:
+        if fields:
+            return StreamingResponse(_ndjson_projected_stream(cursor, model, drop_fields), media_type="application/x-ndjson")
+        return StreamingResponse(_ndjson_stream(cursor, model), media_type="application/x-ndjson")
+    
+    docs = await cursor.to_list(None)
+    headers = {}
+    if limit and len(docs) == limit:
+        headers["X-Next-Cursor"] = _encode_cursor(docs[-1].get(sort_field), docs[-1]["id"])
+    
+    if fields:
+        for doc in docs:
+            for field in drop_fields:
+                doc.pop(field, None)
+            _decode_partial(model, doc)
+        # Partial documents can't go through the full response model
+        return JSONResponse(jsonable_encoder(docs), headers=headers)
+    return _json_response(List[model], docs, headers)
+
 # Tool endpoints
-@api_router.get("/tools", response_model=List[Tool])
-async def get_tools():
-    tools = await db.tools.find().to_list(1000)
-    # Clean tools data by removing MongoDB ObjectId
-    clean_tools = [{k: v for k, v in tool.items() if k != '_id'} for tool in tools]
-    return [Tool(**tool) for tool in clean_tools]
+@api_router.get("/tools", response_model=List[Tool], dependencies=[_conditional_get("tools")])
+async def get_tools(
+    status: Optional[ToolStatus] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    calibration_due_from: Optional[date] = None,
+    calibration_due_to: Optional[date] = None,
+    q: Optional[str] = Query(None, description="Text search on name and serial number"),
+    sort: ToolSortField = ToolSortField.CREATED_AT,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,serial_number"),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    stream: bool = False
+):
+    query = {}
+    if status:
+        query["status"] = status
+    if category:
+        query["category"] = category
+    if location:
+        query["location"] = location
+    if calibration_due_from or calibration_due_to:
+        query["calibration_due"] = {}
+        if calibration_due_from:
+            query["calibration_due"]["$gte"] = _encode_value(calibration_due_from)
+        if calibration_due_to:
+            query["calibration_due"]["$lte"] = _encode_value(calibration_due_to)
+    if q:
+        query["$text"] = {"$search": q}
+    
+    field_list = None
+    if fields:
+        field_list = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in field_list if field not in Tool.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    return await _list_documents(db.tools, Tool, query, sort.value, after, limit, stream, field_list)
 
 @api_router.post("/tools", response_model=Tool)
 async def create_tool(tool: ToolCreate):
     tool_dict = tool.dict()
     tool_obj = Tool(**tool_dict)
-    
-    # Convert Tool object to dict and handle date serialization
-    tool_data = tool_obj.dict()
-    
-    # Convert date objects to ISO format strings for MongoDB
-    if tool_data.get('calibration_due'):
-        tool_data['calibration_due'] = tool_data['calibration_due'].isoformat()
-    if tool_data.get('created_at'):
-        tool_data['created_at'] = tool_data['created_at'].isoformat()
-    if tool_data.get('updated_at'):
-        tool_data['updated_at'] = tool_data['updated_at'].isoformat()
+    tool_data = _to_document(tool_obj)
     
     await db.tools.insert_one(tool_data)
+    await _publish_change("tool.created", tool_obj)
     return tool_obj
 
-@api_router.get("/tools/{tool_id}", response_model=Tool)
+def _iter_tool_rows(upload: UploadFile, file_format: DataFormat):
+    """Yield (line number, row) pairs from an uploaded CSV or NDJSON file, one line at a time.
+
+    Rows that cannot be parsed are yielded as None so they are reported like validation errors.
+    """
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    if file_format == DataFormat.CSV:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells fall back to the model defaults
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+
+@api_router.post("/tools/import", response_model=ToolImportResult)
+async def import_tools(file: UploadFile = File(...), format: Optional[DataFormat] = None):
+    file_format = format
+    if file_format is None:
+        file_format = DataFormat.NDJSON if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else DataFormat.CSV
+    
+    imported = 0
+    errors = []
+    failed = 0
+    batch = []
+    
+    async def flush():
+        nonlocal imported
+        await db.tools.insert_many(batch, ordered=False)
+        imported += len(batch)
+        batch.clear()
+    
+    for line_number, row in _iter_tool_rows(file, file_format):
+        if row is None:
+            detail = "Malformed row"
+        else:
+            try:
+                batch.append(_to_document(Tool(**ToolCreate(**row).dict())))
+                detail = None
+            except ValidationError as e:
+                detail = _validation_message(e)
+        if detail:
+            failed += 1
+            # Report the first errors only so a bad file doesn't produce a huge response
+            if len(errors) < 100:
+                errors.append({"line": line_number, "detail": detail})
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    
+    if imported:
+        await _publish_change("resync", {"collections": ["tools"]})
+    return ToolImportResult(imported=imported, failed=failed, errors=errors)
+
+async def _export_tool_rows(file_format: DataFormat):
+    cursor = db.tools.find({}, {"_id": 0}).sort([("created_at", 1), ("id", 1)])
+    adapter = _type_adapter(Tool)
+    if file_format == DataFormat.NDJSON:
+        async for tool in cursor:
+            yield adapter.dump_json(adapter.validate_python(tool)) + b"\n"
+        return
+    
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(Tool.model_fields))
+    writer.writeheader()
+    rows = 0
+    async for tool in cursor:
+        # Same value formatting as the JSON API, so exported files can be imported again
+        writer.writerow(adapter.dump_python(adapter.validate_python(tool), mode="json"))
+        rows += 1
+        # Flush in chunks rather than per row to keep the number of writes down
+        if rows % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+@api_router.get("/tools/export")
+async def export_tools(format: DataFormat = DataFormat.CSV):
+    media_type = "text/csv" if format == DataFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        _export_tool_rows(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tools.{format.value}"'}
+    )
+
+@api_router.get("/tools/calibration-due", response_model=List[Tool], dependencies=[_conditional_get("tools", per_day=True)])
+async def get_tools_calibration_due(
+    days: int = Query(30, ge=0, description="Include tools due within this many days; past-due tools are always included"),
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    # Range scan on the (calibration_due, id) index, soonest due first
+    due_by = _encode_value(datetime.utcnow().date() + timedelta(days=days))
+    query = {"calibration_due": {"$lte": due_by}}
+    return await _list_documents(db.tools, Tool, query, "calibration_due", after, limit, False)
+
+async def mark_tools_needing_calibration() -> int:
+    """Move available tools whose calibration date has passed to needs_calibration in one write.
+
+    Checked-out tools are left alone and picked up by a later run once returned.
+    """
+    now = datetime.utcnow()
+    result = await db.tools.update_many(
+        {"status": ToolStatus.AVAILABLE, "calibration_due": {"$lt": _encode_value(now.date())}},
+        {"$set": {"status": ToolStatus.NEEDS_CALIBRATION, "updated_at": now}}
+    )
+    if result.modified_count:
+        logger.info(f"Marked {result.modified_count} tools as needing calibration")
+        await _publish_change("resync", {"collections": ["tools"]})
+    return result.modified_count
+
+@api_router.get("/tools/{tool_id}", response_model=Tool, dependencies=[_conditional_get("tools")])
 async def get_tool(tool_id: str):
-    tool = await db.tools.find_one({"id": tool_id})
+    tool = await entity_cache.get("tools", tool_id)
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
-    # Clean tool data by removing MongoDB ObjectId
-    clean_tool = {k: v for k, v in tool.items() if k != '_id'}
-    return Tool(**clean_tool)
+    return _json_response(Tool, tool)
 
 @api_router.put("/tools/{tool_id}", response_model=Tool)
 async def update_tool(tool_id: str, tool_update: ToolCreate):
@@ -175,64 +1267,251 @@ async def update_tool(tool_id: str, tool_update: ToolCreate):
     if not existing_tool:
         raise HTTPException(status_code=404, detail="Tool not found")
     
-    update_data = tool_update.dict()
-    update_data["updated_at"] = datetime.utcnow().isoformat()
-    
-    # Convert date objects to ISO format strings for MongoDB
-    if update_data.get('calibration_due'):
-        if isinstance(update_data['calibration_due'], date):
-            update_data['calibration_due'] = update_data['calibration_due'].isoformat()
+    update_data = _to_document(tool_update)
+    update_data["updated_at"] = datetime.utcnow()
     
     await db.tools.update_one({"id": tool_id}, {"$set": update_data})
-    updated_tool = await db.tools.find_one({"id": tool_id})
-    # Clean tool data by removing MongoDB ObjectId
-    clean_tool = {k: v for k, v in updated_tool.items() if k != '_id'}
-    return Tool(**clean_tool)
+    if tool_update.calibration_due is None or tool_update.calibration_due >= datetime.utcnow().date():
+        # Recalibrated (or no longer calibrated): back in service unless something else changed it meanwhile
+        await db.tools.update_one(
+            {"id": tool_id, "status": ToolStatus.NEEDS_CALIBRATION},
+            {"$set": {"status": ToolStatus.AVAILABLE}}
+        )
+    updated_tool = Tool.model_validate(await db.tools.find_one({"id": tool_id}, {"_id": 0}))
+    await _publish_change("tool.updated", updated_tool)
+    return _json_response(Tool, updated_tool)
 
 @api_router.delete("/tools/{tool_id}")
 async def delete_tool(tool_id: str):
-    result = await db.tools.delete_one({"id": tool_id})
-    if result.deleted_count == 0:
+    deleted = await db.tools.find_one_and_delete({"id": tool_id}, projection={"_id": 0, "image_url": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Tool not found")
+    await _publish_change("tool.deleted", {"id": tool_id})
+    await _release_image(deleted.get("image_url"))
     return {"message": "Tool deleted successfully"}
 
+# Tool image endpoints. Images are stored once per content hash under
+# IMAGE_STORAGE_DIR/<sha256>/, as the original plus JPEG thumbnails. URLs embed the
+# hash, so a served file never changes and can be cached by browsers indefinitely.
+IMAGE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+IMAGE_MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+IMAGE_VARIANTS = {"thumb": IMAGE_THUMBNAIL_SIZE, "preview": IMAGE_PREVIEW_SIZE}
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+IMAGE_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="images")
+
+async def _run_in_image_thread(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(image_executor, func, *args)
+
+def _image_urls(digest: str) -> dict:
+    return {"image_url": f"/api/images/{digest}/original", "thumbnail_url": f"/api/images/{digest}/thumb"}
+
+class InvalidImage(Exception):
+    """An upload that is not an image in one of IMAGE_FORMATS."""
+
+def _decode_image(incoming: Path) -> Image.Image:
+    """Fully decode an uploaded file, so that only decoding errors become InvalidImage."""
+    with open(incoming, "rb") as file:
+        try:
+            with Image.open(file) as image:
+                image.verify()
+            file.seek(0)
+            image = Image.open(file)
+            image.load()
+        except (UnidentifiedImageError, SyntaxError, ValueError, OSError, Image.DecompressionBombError) as e:
+            raise InvalidImage(str(e)) from e
+    if image.format not in IMAGE_FORMATS:
+        raise InvalidImage(f"Unsupported image format {image.format}")
+    return image
+
+def _store_image(incoming: Path, digest: str):
+    """Validate an uploaded file and store a copy with its thumbnails (runs in image_executor)."""
+    target = IMAGE_STORAGE_DIR / digest
+    if target.exists():
+        return
+    with _decode_image(incoming) as image:
+        extension = IMAGE_FORMATS[image.format]
+        # Build in a scratch directory and rename it into place, so readers never see a partial set
+        staging = IMAGE_STORAGE_DIR / f".staging-{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            oriented = ImageOps.exif_transpose(image)
+            for variant, size in IMAGE_VARIANTS.items():
+                resized = oriented.copy()
+                resized.thumbnail((size, size))
+                resized.convert("RGB").save(staging / f"{variant}.jpg", "JPEG", quality=85, optimize=True)
+            shutil.copyfile(incoming, staging / f"original.{extension}")
+            try:
+                staging.rename(target)
+            except OSError:
+                # The same image was stored concurrently
+                shutil.rmtree(staging, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+async def _release_image(image_url: Optional[str]):
+    """Delete a stored image once no tool refers to it any more.
+
+    The files are moved aside before a last reference check, so an upload of the
+    same image that lands meanwhile either keeps them or finds them gone and
+    stores them again.
+    """
+    if not image_url or await db.tools.count_documents({"image_url": image_url}, limit=1):
+        return
+    digest = image_url.split("/")[-2]
+    if not IMAGE_DIGEST_PATTERN.fullmatch(digest):
+        return
+    target = IMAGE_STORAGE_DIR / digest
+    removed = IMAGE_STORAGE_DIR / f".removed-{uuid.uuid4().hex}"
+    try:
+        await _run_in_image_thread(target.rename, removed)
+    except FileNotFoundError:
+        return
+    if await db.tools.count_documents({"image_url": image_url}, limit=1):
+        try:
+            await _run_in_image_thread(removed.rename, target)
+            return
+        except OSError:
+            pass  # Already stored again by the upload that referenced it
+    await _run_in_image_thread(shutil.rmtree, removed, True)
+
+async def _receive_image(file: UploadFile, incoming: Path) -> str:
+    """Copy an upload to `incoming` and store it; returns its digest."""
+    # Copy the upload in chunks, hashing as we go, so large photos are never held in memory
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(incoming, "wb") as out:
+            while chunk := await file.read(IMAGE_UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > IMAGE_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Images are limited to {IMAGE_MAX_BYTES} bytes")
+                hasher.update(chunk)
+                await _run_in_image_thread(out.write, chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        digest = hasher.hexdigest()
+        await _run_in_image_thread(_store_image, incoming, digest)
+    except InvalidImage as e:
+        # The decoder's message names the scratch file, so it is only logged
+        logger.info(f"Rejected image upload {file.filename!r}: {e}")
+        raise HTTPException(status_code=400, detail="Not a supported image")
+    return digest
+
+@api_router.post("/tools/{tool_id}/image", response_model=Tool)
+async def upload_tool_image(tool_id: str, file: UploadFile = File(...)):
+    if not await entity_cache.get("tools", tool_id):
+        raise HTTPException(status_code=404, detail="Tool not found")
+    
+    (IMAGE_STORAGE_DIR / ".incoming").mkdir(parents=True, exist_ok=True)
+    incoming = IMAGE_STORAGE_DIR / ".incoming" / uuid.uuid4().hex
+    try:
+        digest = await _receive_image(file, incoming)
+        previous = await db.tools.find_one_and_update(
+            {"id": tool_id},
+            {"$set": {**_image_urls(digest), "updated_at": datetime.utcnow()}},
+            projection={"_id": 0}
+        )
+        if previous is None:
+            await _release_image(_image_urls(digest)["image_url"])
+            raise HTTPException(status_code=404, detail="Tool not found")
+        # Stores the files again if a release of the same image by another tool removed them before this reference landed
+        await _run_in_image_thread(_store_image, incoming, digest)
+    finally:
+        incoming.unlink(missing_ok=True)
+    
+    updated_tool = Tool.model_validate({**previous, **_image_urls(digest)})
+    await _publish_change("tool.updated", updated_tool)
+    if previous.get("image_url") != updated_tool.image_url:
+        await _release_image(previous.get("image_url"))
+    return _json_response(Tool, updated_tool)
+
+def _byte_range(header: str, size: int):
+    """Parse a single-range Range header into (start, end) inclusive, or None to send the whole file."""
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+async def _file_chunks(path: Path, start: int, length: int):
+    with open(path, "rb") as f:
+        await _run_in_image_thread(f.seek, start)
+        while length > 0:
+            chunk = await _run_in_image_thread(f.read, min(IMAGE_UPLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+@api_router.get("/images/{digest}/{variant}")
+async def get_image(request: Request, digest: str, variant: str):
+    if not IMAGE_DIGEST_PATTERN.fullmatch(digest) or variant not in ("original", *IMAGE_VARIANTS):
+        raise HTTPException(status_code=404, detail="Image not found")
+    directory = IMAGE_STORAGE_DIR / digest
+    if variant == "original":
+        path = next(directory.glob("original.*"), None)
+    else:
+        path = directory / f"{variant}.jpg"
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    etag = f'"{digest[:32]}-{variant}"'
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL, "ETag": etag, "Accept-Ranges": "bytes"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    media_type = IMAGE_MEDIA_TYPES[path.suffix[1:]]
+    size = path.stat().st_size
+    byte_range = _byte_range(request.headers["range"], size) if "range" in request.headers else None
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(
+        _file_chunks(path, start, end - start + 1), status_code=206, media_type=media_type, headers=headers
+    )
+
 # Project endpoints
-@api_router.get("/projects", response_model=List[Project])
-async def get_projects():
-    projects = await db.projects.find().to_list(1000)
-    # Clean projects data by removing MongoDB ObjectId
-    clean_projects = [{k: v for k, v in project.items() if k != '_id'} for project in projects]
-    return [Project(**project) for project in clean_projects]
+@api_router.get("/projects", response_model=List[Project], dependencies=[_conditional_get("projects")])
+async def get_projects(
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    stream: bool = False
+):
+    return await _list_documents(db.projects, Project, {}, "created_at", after, limit, stream)
 
 @api_router.post("/projects", response_model=Project)
 async def create_project(project: ProjectCreate):
     project_dict = project.dict()
     project_obj = Project(**project_dict)
     
-    # Convert Project object to dict and handle date serialization
-    project_data = project_obj.dict()
-    
-    # Convert date objects to ISO format strings for MongoDB
-    if project_data.get('start_date'):
-        project_data['start_date'] = project_data['start_date'].isoformat()
-    if project_data.get('end_date'):
-        project_data['end_date'] = project_data['end_date'].isoformat()
-    if project_data.get('created_at'):
-        project_data['created_at'] = project_data['created_at'].isoformat()
-    if project_data.get('updated_at'):
-        project_data['updated_at'] = project_data['updated_at'].isoformat()
+    project_data = _to_document(project_obj)
     
     await db.projects.insert_one(project_data)
+    await _publish_change("project.created", project_obj)
     return project_obj
 
-@api_router.get("/projects/{project_id}", response_model=Project)
+@api_router.get("/projects/{project_id}", response_model=Project, dependencies=[_conditional_get("projects")])
 async def get_project(project_id: str):
-    project = await db.projects.find_one({"id": project_id})
+    project = await entity_cache.get("projects", project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    # Clean project data by removing MongoDB ObjectId
-    clean_project = {k: v for k, v in project.items() if k != '_id'}
-    return Project(**clean_project)
+    return _json_response(Project, project)
 
 @api_router.put("/projects/{project_id}", response_model=Project)
 async def update_project(project_id: str, project_update: ProjectCreate):
@@ -240,60 +1519,156 @@ async def update_project(project_id: str, project_update: ProjectCreate):
     if not existing_project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    update_data = project_update.dict()
-    update_data["updated_at"] = datetime.utcnow().isoformat()
-    
-    # Convert date objects to ISO format strings for MongoDB
-    if update_data.get('start_date'):
-        if isinstance(update_data['start_date'], date):
-            update_data['start_date'] = update_data['start_date'].isoformat()
-    if update_data.get('end_date'):
-        if isinstance(update_data['end_date'], date):
-            update_data['end_date'] = update_data['end_date'].isoformat()
+    update_data = _to_document(project_update)
+    update_data["updated_at"] = datetime.utcnow()
     
     await db.projects.update_one({"id": project_id}, {"$set": update_data})
-    updated_project = await db.projects.find_one({"id": project_id})
-    # Clean project data by removing MongoDB ObjectId
-    clean_project = {k: v for k, v in updated_project.items() if k != '_id'}
-    return Project(**clean_project)
+    updated_project = Project.model_validate(await db.projects.find_one({"id": project_id}, {"_id": 0}))
+    await _publish_change("project.updated", updated_project)
+    return _json_response(Project, updated_project)
 
 # Worker endpoints
-@api_router.get("/workers", response_model=List[Worker])
-async def get_workers():
-    workers = await db.workers.find().to_list(1000)
-    # Clean workers data by removing MongoDB ObjectId
-    clean_workers = [{k: v for k, v in worker.items() if k != '_id'} for worker in workers]
-    return [Worker(**worker) for worker in clean_workers]
+@api_router.get("/workers", response_model=List[Worker], dependencies=[_conditional_get("workers")])
+async def get_workers(
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    stream: bool = False
+):
+    return await _list_documents(db.workers, Worker, {}, "created_at", after, limit, stream)
 
 @api_router.post("/workers", response_model=Worker)
 async def create_worker(worker: WorkerCreate):
     worker_dict = worker.dict()
     worker_obj = Worker(**worker_dict)
     
-    # Convert Worker object to dict and handle date serialization
-    worker_data = worker_obj.dict()
-    
-    # Convert datetime objects to ISO format strings for MongoDB
-    if worker_data.get('created_at'):
-        worker_data['created_at'] = worker_data['created_at'].isoformat()
+    worker_data = _to_document(worker_obj)
     
     await db.workers.insert_one(worker_data)
+    await _publish_change("worker.created", worker_obj)
     return worker_obj
 
-@api_router.get("/workers/{worker_id}", response_model=Worker)
+@api_router.get("/workers/{worker_id}", response_model=Worker, dependencies=[_conditional_get("workers")])
 async def get_worker(worker_id: str):
-    worker = await db.workers.find_one({"id": worker_id})
+    worker = await entity_cache.get("workers", worker_id)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
-    # Clean worker data by removing MongoDB ObjectId
-    clean_worker = {k: v for k, v in worker.items() if k != '_id'}
-    return Worker(**clean_worker)
+    return _json_response(Worker, worker)
 
 # Checkout endpoints
+# Checkouts whose tool is still out; overdue ones can be returned like active ones
+OUTSTANDING_STATUSES = [CheckoutStatus.ACTIVE, CheckoutStatus.OVERDUE]
+
+def _bulk_result(results: List[BulkItemResult]) -> BulkOperationResult:
+    succeeded = sum(1 for result in results if result.success)
+    return BulkOperationResult(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+async def _bulk_checkout(items: List[CheckoutCreate]) -> BulkOperationResult:
+    """Check out many tools with one batched read per collection and bulk writes.
+
+    Items are validated like POST /api/checkout; failures are reported per item
+    and do not stop the rest of the batch.
+    """
+    tool_ids = list({item.tool_id for item in items})
+    tools, projects, workers = await asyncio.gather(
+        db.tools.find({"id": {"$in": tool_ids}}, {"_id": 0, "id": 1, "status": 1}).to_list(None),
+        db.projects.find({"id": {"$in": list({item.project_id for item in items})}}, {"_id": 0, "id": 1}).to_list(None),
+        db.workers.find({"id": {"$in": list({item.worker_id for item in items})}}, {"_id": 0, "id": 1}).to_list(None)
+    )
+    tool_status = {tool["id"]: tool["status"] for tool in tools}
+    project_ids = {project["id"] for project in projects}
+    worker_ids = {worker["id"] for worker in workers}
+    
+    results = [BulkItemResult(tool_id=item.tool_id, success=False) for item in items]
+    candidates = {}  # tool_id -> index of the item checking it out
+    for index, item in enumerate(items):
+        if item.tool_id not in tool_status:
+            results[index].detail = "Tool not found"
+        elif tool_status[item.tool_id] != ToolStatus.AVAILABLE or item.tool_id in candidates:
+            results[index].detail = "Tool is not available for checkout"
+        elif item.project_id not in project_ids:
+            results[index].detail = "Project not found"
+        elif item.worker_id not in worker_ids:
+            results[index].detail = "Worker not found"
+        else:
+            candidates[item.tool_id] = index
+    
+    if not candidates:
+        return _bulk_result(results)
+    
+    # Claim every candidate tool with a status precondition, as the single checkout does
+    claim_id = uuid.uuid4().hex
+    claim_time = datetime.utcnow()
+    claim_result = await db.tools.bulk_write([
+        UpdateOne(
+            {"id": tool_id, "status": ToolStatus.AVAILABLE},
+            {"$set": {"status": ToolStatus.CHECKED_OUT, "updated_at": claim_time, "checkout_claim": claim_id}}
+        )
+        for tool_id in candidates
+    ], ordered=False)
+    if claim_result.modified_count < len(candidates):
+        # Lost some claims to concurrent checkouts; ours carry this request's claim token
+        claimed = await db.tools.find(
+            {"id": {"$in": list(candidates)}, "status": ToolStatus.CHECKED_OUT, "checkout_claim": claim_id},
+            {"_id": 0, "id": 1}
+        ).to_list(None)
+        claimed_ids = {tool["id"] for tool in claimed}
+        for tool_id in list(candidates):
+            if tool_id not in claimed_ids:
+                results[candidates.pop(tool_id)].detail = "Tool is not available for checkout"
+        if not candidates:
+            return _bulk_result(results)
+    
+    records = {tool_id: CheckoutRecord(**items[index].dict()) for tool_id, index in candidates.items()}
+    documents = [_to_document(record) for record in records.values()]
+    
+    async def release(tool_ids):
+        # Release the claims of tools whose record could not be written
+        await db.tools.update_many(
+            {"id": {"$in": list(tool_ids)}, "status": ToolStatus.CHECKED_OUT, "checkout_claim": claim_id},
+            {"$set": {"status": ToolStatus.AVAILABLE, "updated_at": datetime.utcnow()}}
+        )
+    
+    failed_tool_ids = set()
+    try:
+        await db.checkout_records.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed_tool_ids.add(documents[error["index"]]["tool_id"])
+    except Exception:
+        # Unknown which records were written, if any: release only the tools without one
+        written = await db.checkout_records.find(
+            {"id": {"$in": [record.id for record in records.values()]}}, {"_id": 0, "tool_id": 1}
+        ).to_list(None)
+        await release(set(candidates) - {record["tool_id"] for record in written})
+        raise
+    
+    if failed_tool_ids:
+        await release(failed_tool_ids)
+    
+    for tool_id, index in candidates.items():
+        if tool_id in failed_tool_ids:
+            results[index].detail = "Failed to create checkout record"
+        else:
+            results[index].success = True
+            results[index].checkout_id = records[tool_id].id
+            results[index].checkout = records[tool_id]
+    await _publish_change("checkout.created", {
+        "checkouts": [record for tool_id, record in records.items() if tool_id not in failed_tool_ids]
+    })
+    
+    return _bulk_result(results)
+
 @api_router.post("/checkout", response_model=CheckoutRecord)
 async def checkout_tool(checkout: CheckoutCreate):
+    # Look up tool, project and worker concurrently; the reads are independent.
+    # The tool is read fresh for its status, projects and workers come from the cache.
+    tool, project, worker = await asyncio.gather(
+        db.tools.find_one({"id": checkout.tool_id}, {"_id": 0, "status": 1}),
+        entity_cache.get("projects", checkout.project_id),
+        entity_cache.get("workers", checkout.worker_id)
+    )
+    
     # Check if tool exists and is available
-    tool = await db.tools.find_one({"id": checkout.tool_id})
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
     
@@ -301,48 +1676,49 @@ async def checkout_tool(checkout: CheckoutCreate):
         raise HTTPException(status_code=400, detail="Tool is not available for checkout")
     
     # Check if project exists
-    project = await db.projects.find_one({"id": checkout.project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Check if worker exists
-    worker = await db.workers.find_one({"id": checkout.worker_id})
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     
     # Create checkout record
     checkout_dict = checkout.dict()
     checkout_obj = CheckoutRecord(**checkout_dict)
+    checkout_data = _to_document(checkout_obj)
     
-    # Convert CheckoutRecord object to dict and handle date serialization
-    checkout_data = checkout_obj.dict()
-    
-    # Convert datetime/date objects to ISO format strings for MongoDB
-    if checkout_data.get('checkout_date'):
-        checkout_data['checkout_date'] = checkout_data['checkout_date'].isoformat()
-    if checkout_data.get('expected_return'):
-        checkout_data['expected_return'] = checkout_data['expected_return'].isoformat()
-    if checkout_data.get('actual_return'):
-        checkout_data['actual_return'] = checkout_data['actual_return'].isoformat()
-    
-    await db.checkout_records.insert_one(checkout_data)
-    
-    # Update tool status
-    await db.tools.update_one(
-        {"id": checkout.tool_id},
-        {"$set": {"status": ToolStatus.CHECKED_OUT, "updated_at": datetime.utcnow().isoformat()}}
+    # Claim the tool with a status precondition so that concurrent checkouts
+    # of the same tool cannot both succeed
+    claimed = await db.tools.find_one_and_update(
+        {"id": checkout.tool_id, "status": ToolStatus.AVAILABLE},
+        {"$set": {"status": ToolStatus.CHECKED_OUT, "updated_at": datetime.utcnow()}},
+        projection={"_id": 1}
     )
+    if not claimed:
+        raise HTTPException(status_code=400, detail="Tool is not available for checkout")
+    
+    try:
+        await db.checkout_records.insert_one(checkout_data)
+    except Exception:
+        # Release the claim so the tool isn't left checked out without a record
+        await db.tools.update_one(
+            {"id": checkout.tool_id, "status": ToolStatus.CHECKED_OUT},
+            {"$set": {"status": ToolStatus.AVAILABLE, "updated_at": datetime.utcnow()}}
+        )
+        raise
+    await _publish_change("checkout.created", {"checkouts": [checkout_obj]})
     
     return checkout_obj
 
 @api_router.post("/return")
-async def return_tool(return_data: ReturnTool):
+async def return_tool(return_data: ReturnTool, tasks: BackgroundTasks):
     # Find the checkout record
     checkout = await db.checkout_records.find_one({"id": return_data.checkout_id})
     if not checkout:
         raise HTTPException(status_code=404, detail="Checkout record not found")
     
-    if checkout["status"] != CheckoutStatus.ACTIVE:
+    if checkout["status"] not in OUTSTANDING_STATUSES:
         raise HTTPException(status_code=400, detail="Tool is already returned")
     
     # Update checkout record
@@ -350,7 +1726,7 @@ async def return_tool(return_data: ReturnTool):
     await db.checkout_records.update_one(
         {"id": return_data.checkout_id},
         {"$set": {
-            "actual_return": return_time.isoformat(),
+            "actual_return": return_time,
             "status": CheckoutStatus.RETURNED,
             "notes": return_data.notes
         }}
@@ -359,98 +1735,1015 @@ async def return_tool(return_data: ReturnTool):
     # Update tool status back to available
     await db.tools.update_one(
         {"id": checkout["tool_id"]},
-        {"$set": {"status": ToolStatus.AVAILABLE, "updated_at": return_time.isoformat()}}
+        {"$set": {"status": ToolStatus.AVAILABLE, "updated_at": return_time}}
     )
+    await _publish_change("checkout.returned", {"checkouts": [
+        {"id": return_data.checkout_id, "tool_id": checkout["tool_id"], "actual_return": return_time}
+    ]})
+    tasks.add_task(_roll_up_returned, [return_data.checkout_id])
     
     return {"message": "Tool returned successfully"}
 
-@api_router.get("/checkouts", response_model=List[CheckoutRecord])
-async def get_checkouts(status: Optional[CheckoutStatus] = None):
+@api_router.post("/checkout/bulk", response_model=BulkOperationResult)
+async def bulk_checkout_tools(bulk: BulkCheckoutCreate):
+    return await _bulk_checkout(bulk.items)
+
+@api_router.post("/projects/{project_id}/checkout", response_model=BulkOperationResult)
+async def checkout_project_tools(project_id: str, checkout: ProjectCheckoutCreate):
+    # Issue a project's whole required_tools kit to one worker in a single call
+    project = await db.projects.find_one({"id": project_id}, {"_id": 0, "required_tools": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    items = [
+        CheckoutCreate(
+            tool_id=tool_id,
+            project_id=project_id,
+            worker_id=checkout.worker_id,
+            expected_return=checkout.expected_return,
+            notes=checkout.notes
+        )
+        for tool_id in project.get("required_tools", [])
+    ]
+    return await _bulk_checkout(items)
+
+@api_router.post("/return/bulk", response_model=BulkOperationResult)
+async def bulk_return_tools(bulk: BulkReturnTool, tasks: BackgroundTasks):
+    checkouts = await db.checkout_records.find(
+        {"id": {"$in": list(set(bulk.checkout_ids))}},
+        {"_id": 0, "id": 1, "tool_id": 1, "status": 1}
+    ).to_list(None)
+    checkouts_by_id = {checkout["id"]: checkout for checkout in checkouts}
+    
+    results = [BulkItemResult(checkout_id=checkout_id, success=False) for checkout_id in bulk.checkout_ids]
+    candidates = {}  # checkout_id -> index of the item returning it
+    for index, checkout_id in enumerate(bulk.checkout_ids):
+        checkout = checkouts_by_id.get(checkout_id)
+        if not checkout:
+            results[index].detail = "Checkout record not found"
+            continue
+        results[index].tool_id = checkout["tool_id"]
+        if checkout["status"] not in OUTSTANDING_STATUSES or checkout_id in candidates:
+            results[index].detail = "Tool is already returned"
+        else:
+            candidates[checkout_id] = index
+    
+    if not candidates:
+        return _bulk_result(results)
+    
+    return_claim = uuid.uuid4().hex
+    return_time = datetime.utcnow()
+    close_result = await db.checkout_records.bulk_write([
+        UpdateOne(
+            {"id": checkout_id, "status": {"$in": OUTSTANDING_STATUSES}},
+            {"$set": {
+                "actual_return": return_time, "status": CheckoutStatus.RETURNED, "notes": bulk.notes,
+                "return_claim": return_claim
+            }}
+        )
+        for checkout_id in candidates
+    ], ordered=False)
+    if close_result.modified_count < len(candidates):
+        # Some records were returned concurrently; ours carry this request's claim token
+        closed = await db.checkout_records.find(
+            {"id": {"$in": list(candidates)}, "return_claim": return_claim},
+            {"_id": 0, "id": 1}
+        ).to_list(None)
+        closed_ids = {checkout["id"] for checkout in closed}
+        for checkout_id in list(candidates):
+            if checkout_id not in closed_ids:
+                results[candidates.pop(checkout_id)].detail = "Tool is already returned"
+    
+    if candidates:
+        # Update tool statuses back to available
+        await db.tools.update_many(
+            {"id": {"$in": [checkouts_by_id[checkout_id]["tool_id"] for checkout_id in candidates]}},
+            {"$set": {"status": ToolStatus.AVAILABLE, "updated_at": return_time}}
+        )
+        for index in candidates.values():
+            results[index].success = True
+        await _publish_change("checkout.returned", {"checkouts": [
+            {"id": checkout_id, "tool_id": checkouts_by_id[checkout_id]["tool_id"], "actual_return": return_time}
+            for checkout_id in candidates
+        ]})
+        tasks.add_task(_roll_up_returned, list(candidates))
+    
+    return _bulk_result(results)
+
+@api_router.get("/checkouts", response_model=List[CheckoutRecord], dependencies=[_conditional_get("checkout_records")])
+async def get_checkouts(
+    status: Optional[CheckoutStatus] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    stream: bool = False
+):
     query = {}
     if status:
         query["status"] = status
     
-    checkouts = await db.checkout_records.find(query).to_list(1000)
-    # Clean checkouts data by removing MongoDB ObjectId
-    clean_checkouts = [{k: v for k, v in checkout.items() if k != '_id'} for checkout in checkouts]
-    return [CheckoutRecord(**checkout) for checkout in clean_checkouts]
+    return await _list_documents(db.checkout_records, CheckoutRecord, query, "checkout_date", after, limit, stream)
+
+def _lookup_one(collection: str, local_field: str, as_field: str) -> List[dict]:
+    """Pipeline stages joining a single document from `collection` by its `id` field."""
+    return [
+        {"$lookup": {"from": collection, "localField": local_field, "foreignField": "id", "as": as_field}},
+        {"$unwind": {"path": f"${as_field}", "preserveNullAndEmptyArrays": True}},
+    ]
+
+async def _checkout_details(match: dict) -> Response:
+    # Join tool, project and worker details server-side in a single aggregation
+    pipeline = [
+        {"$match": match},
+        *_lookup_one("tools", "tool_id", "tool"),
+        *_lookup_one("projects", "project_id", "project"),
+        *_lookup_one("workers", "worker_id", "worker"),
+        {"$project": {"_id": 0, "tool._id": 0, "project._id": 0, "worker._id": 0}},
+    ]
+    checkouts = await db.checkout_records.aggregate(pipeline).to_list(None)
+    
+    result = [
+        {
+            "tool": checkout.pop("tool", None),
+            "project": checkout.pop("project", None),
+            "worker": checkout.pop("worker", None),
+            "checkout": checkout
+        }
+        for checkout in checkouts
+    ]
+    return _json_response(List[ActiveCheckout], result)
 
-@api_router.get("/checkouts/active")
+@api_router.get("/checkouts/active", response_model=List[ActiveCheckout],
+                dependencies=[_conditional_get("checkout_records", "tools", "projects", "workers")])
 async def get_active_checkouts():
-    # Get active checkouts with tool, project, and worker details
-    checkouts = await db.checkout_records.find({"status": CheckoutStatus.ACTIVE}).to_list(1000)
-    
-    result = []
-    for checkout in checkouts:
-        tool = await db.tools.find_one({"id": checkout["tool_id"]})
-        project = await db.projects.find_one({"id": checkout["project_id"]})
-        worker = await db.workers.find_one({"id": checkout["worker_id"]})
-        
-        # Clean all data by removing MongoDB ObjectId
-        clean_checkout = {k: v for k, v in checkout.items() if k != '_id'}
-        clean_tool = {k: v for k, v in tool.items() if k != '_id'} if tool else None
-        clean_project = {k: v for k, v in project.items() if k != '_id'} if project else None
-        clean_worker = {k: v for k, v in worker.items() if k != '_id'} if worker else None
-        
-        result.append({
-            "checkout": CheckoutRecord(**clean_checkout),
-            "tool": Tool(**clean_tool) if clean_tool else None,
-            "project": Project(**clean_project) if clean_project else None,
-            "worker": Worker(**clean_worker) if clean_worker else None
+    # Every tool still out, including overdue ones, so they can be returned
+    return await _checkout_details({"status": {"$in": OUTSTANDING_STATUSES}})
+
+@api_router.get("/checkouts/overdue", response_model=List[ActiveCheckout],
+                dependencies=[_conditional_get("checkout_records", "tools", "projects", "workers")])
+async def get_overdue_checkouts():
+    return await _checkout_details({"status": CheckoutStatus.OVERDUE})
+
+async def mark_overdue_checkouts() -> int:
+    """Flag active checkouts whose expected return date has passed as overdue.
+
+    The (status, expected_return) index bounds the scan to records that have
+    become overdue since the last run, however large the history is.
+    """
+    today = _encode_value(datetime.utcnow().date())
+    result = await db.checkout_records.update_many(
+        {"status": CheckoutStatus.ACTIVE, "expected_return": {"$lt": today}},
+        {"$set": {"status": CheckoutStatus.OVERDUE}}
+    )
+    if result.modified_count:
+        logger.info(f"Marked {result.modified_count} checkouts as overdue")
+        await _publish_change("resync", {"collections": ["checkouts"]})
+    return result.modified_count
+
+# Checkout history archive. Returned records are partitioned by the month of their
+# checkout date into checkout_records_archive_YYYY_MM collections, so the hot
+# collection only holds outstanding and recently returned checkouts, and an old
+# month can be dropped as a whole.
+ARCHIVE_PREFIX = "checkout_records_archive_"
+_archive_partitions_ready = set()
+
+def _archive_name(moment: datetime) -> str:
+    return f"{ARCHIVE_PREFIX}{moment.year:04d}_{moment.month:02d}"
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    month_index = moment.year * 12 + moment.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+async def _archive_partitions() -> List[str]:
+    names = await db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}"}})
+    return sorted(names)
+
+async def _ensure_archive_partition(name: str):
+    if name not in _archive_partitions_ready:
+        await db[name].create_indexes(ARCHIVE_INDEXES)
+        _archive_partitions_ready.add(name)
+
+async def archive_returned_checkouts(batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move returned checkouts older than ARCHIVE_AFTER_DAYS into their monthly partitions.
+
+    Each batch is copied before it is deleted from the hot collection, so an
+    interrupted run leaves copies rather than gaps; the copies are skipped by the
+    unique id index when the next run moves the same records again.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    # Records still waiting for the rollup catch-up stay in the hot collection it scans
+    query = {"status": CheckoutStatus.RETURNED, "actual_return": {"$lt": cutoff}, "rolled_up": True}
+    archived = 0
+    while True:
+        batch = await db.checkout_records.find(query, {"_id": 0}).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        partitions = {}
+        for record in batch:
+            partitions.setdefault(_archive_name(record["checkout_date"]), []).append(record)
+        for name, records in partitions.items():
+            await _ensure_archive_partition(name)
+            try:
+                await db[name].insert_many(records, ordered=False)
+            except BulkWriteError as e:
+                # Duplicates left by an interrupted run are fine; anything else is not
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+        result = await db.checkout_records.delete_many({
+            "id": {"$in": [record["id"] for record in batch]}, "status": CheckoutStatus.RETURNED
         })
+        archived += result.deleted_count
+        if len(batch) < batch_size:
+            break
+    if archived:
+        logger.info(f"Archived {archived} returned checkouts")
+        await _publish_change("resync", {"collections": ["checkouts"]})
+    return archived
+
+async def drop_expired_archives() -> List[str]:
+    """Drop whole archive months older than ARCHIVE_RETENTION_MONTHS."""
+    if ARCHIVE_RETENTION_MONTHS <= 0:
+        return []
+    oldest_kept = _archive_name(_add_months(_month_start(datetime.utcnow()), -ARCHIVE_RETENTION_MONTHS))
+    expired = [name for name in await _archive_partitions() if name < oldest_kept]
+    for name in expired:
+        await db.drop_collection(name)
+        _archive_partitions_ready.discard(name)
+        logger.info(f"Dropped expired checkout archive {name}")
+    if expired:
+        await _publish_change("resync", {"collections": ["checkouts"]})
+    return expired
+
+async def maintain_checkout_archive():
+    await archive_returned_checkouts()
+    await drop_expired_archives()
+
+@api_router.get("/checkouts/history", response_model=List[CheckoutRecord],
+                dependencies=[_conditional_get("checkout_records")])
+async def get_checkout_history(
+    date_from: Optional[date] = Query(None, alias="from", description="First checkout date to include"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last checkout date to include"),
+    tool_id: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Checkouts in a date range from the hot collection and the archive months it covers,
+    ordered by (checkout_date, id) and paginated with the same cursors as /checkouts."""
+    start = _encode_value(date_from) if date_from else None
+    end = _encode_value(date_to + timedelta(days=1)) if date_to else None
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    query = {}
+    date_range = {}
+    if start:
+        date_range["$gte"] = start
+    if end:
+        date_range["$lt"] = end
+    if date_range:
+        query["checkout_date"] = date_range
+    for field, value in (("tool_id", tool_id), ("worker_id", worker_id), ("project_id", project_id)):
+        if value:
+            query[field] = value
+    if after:
+        sort_value, doc_id = _decode_cursor(after)
+        query = {"$and": [query, {"$or": [
+            {"checkout_date": {"$gt": sort_value}},
+            {"checkout_date": sort_value, "id": {"$gt": doc_id}}
+        ]}]}
     
-    return result
+    # Only the partitions whose month overlaps the range can hold matches
+    first = _archive_name(start) if start else ""
+    last = _archive_name(end - timedelta(microseconds=1)) if end else "~"
+    partitions = [name for name in await _archive_partitions() if first <= name <= last]
+    
+    sources = [db.checkout_records, *(db[name] for name in partitions)]
+    results = await asyncio.gather(*(
+        source.find(query, {"_id": 0}).sort([("checkout_date", 1), ("id", 1)]).limit(limit).to_list(limit)
+        for source in sources
+    ))
+    docs = []
+    for doc in heapq.merge(*results, key=lambda doc: (doc["checkout_date"], doc["id"])):
+        # A record can briefly exist in both places while it is being archived
+        if docs and docs[-1]["id"] == doc["id"]:
+            continue
+        docs.append(doc)
+        if len(docs) == limit:
+            break
+    
+    headers = {}
+    if len(docs) == limit:
+        headers["X-Next-Cursor"] = _encode_cursor(docs[-1]["checkout_date"], docs[-1]["id"])
+    return _json_response(List[CheckoutRecord], docs, headers)
+
+# Analytics rollups. Each returned checkout adds its time out, split by calendar day,
+# to one document per (tool, day) in tool_usage_daily and per (worker, day) in
+# worker_usage_daily; the return day also counts the return and its full duration.
+# The analytics endpoint reads only these rollups, never the checkout history.
+# Outstanding checkouts are counted once they are returned.
+def _split_by_day(start: datetime, end: datetime):
+    """Yield (midnight, seconds) for each calendar day the interval [start, end) covers."""
+    day = datetime.combine(start.date(), dt_time.min)
+    while day < end:
+        next_day = day + timedelta(days=1)
+        seconds = (min(end, next_day) - max(start, day)).total_seconds()
+        if seconds > 0:
+            yield day, seconds
+        day = next_day
+
+def _rollup_increments(records: List[dict], tools: dict, workers: dict):
+    """Sum the rollup increments of a batch of returned records per rollup document."""
+    tool_usage, worker_usage = {}, {}
+    
+    def tool_doc(tool_id: str, day: datetime) -> dict:
+        tool = tools.get(tool_id, {})
+        return tool_usage.setdefault((tool_id, day), {
+            "set": {"tool_name": tool.get("name"), "category": tool.get("category")},
+            "inc": {"seconds_out": 0.0, "returns": 0, "returned_duration_seconds": 0.0}
+        })["inc"]
+    
+    def worker_doc(worker_id: str, day: datetime) -> dict:
+        worker = workers.get(worker_id, {})
+        return worker_usage.setdefault((worker_id, day), {
+            "set": {"worker_name": worker.get("name"), "department": worker.get("department")},
+            "inc": {"seconds_out": 0.0, "checkouts": 0}
+        })["inc"]
+    
+    for record in records:
+        start, end = record["checkout_date"], record["actual_return"]
+        for day, seconds in _split_by_day(start, end):
+            tool_doc(record["tool_id"], day)["seconds_out"] += seconds
+            worker_doc(record["worker_id"], day)["seconds_out"] += seconds
+        return_day = datetime.combine(end.date(), dt_time.min)
+        returned = tool_doc(record["tool_id"], return_day)
+        returned["returns"] += 1
+        returned["returned_duration_seconds"] += max((end - start).total_seconds(), 0.0)
+        worker_doc(record["worker_id"], return_day)["checkouts"] += 1
+    return tool_usage, worker_usage
+
+def _rollup_updates(usage: dict, key_field: str) -> dict:
+    """The update of each rollup document a batch touches, by document _id."""
+    return {
+        f"{key}:{day.date().isoformat()}": {"$set": {key_field: key, "day": day, **doc["set"]}, "$inc": doc["inc"]}
+        for (key, day), doc in usage.items()
+    }
+
+async def _write_rollups(collection, updates: dict, batch: str):
+    # Create missing documents first with an upsert on _id alone, which the server retries when
+    # concurrent batches insert the same document, so the increments below never race an insert
+    await collection.bulk_write([
+        UpdateOne({"_id": doc_id}, {"$setOnInsert": {"rollup_batches": []}}, upsert=True) for doc_id in updates
+    ], ordered=False)
+    # Each document records the batches it has counted, so writing a batch again adds nothing
+    await collection.bulk_write([
+        UpdateOne({"_id": doc_id, "rollup_batches": {"$ne": batch}}, {**update, "$push": {"rollup_batches": batch}})
+        for doc_id, update in updates.items()
+    ], ordered=False)
+
+async def roll_up_checkouts(checkout_ids: List[str]) -> int:
+    """Add returned checkouts to the daily rollups, each exactly once.
+
+    Records are claimed with a batch token before their increments are written, so
+    a return handler and the catch-up job can never both count the same record.
+    """
+    batch = uuid.uuid4().hex
+    await db.checkout_records.update_many(
+        {"id": {"$in": checkout_ids}, "status": CheckoutStatus.RETURNED, "rollup_batch": None},
+        {"$set": {"rollup_batch": batch, "rollup_claimed_at": datetime.utcnow(), "rolled_up": False}}
+    )
+    return await _roll_up_batch(batch)
+
+async def _roll_up_batch(batch: str) -> int:
+    """Write the increments of a claimed batch, then mark its records as rolled up.
+
+    A batch that fails part way is written again, whole, by the catch-up job; the
+    rollup documents it already reached skip it the second time.
+    """
+    records = await db.checkout_records.find(
+        {"rollup_batch": batch, "status": CheckoutStatus.RETURNED},
+        {"_id": 0, "tool_id": 1, "worker_id": 1, "checkout_date": 1, "actual_return": 1}
+    ).to_list(None)
+    if not records:
+        return 0
+    tools, workers = await asyncio.gather(
+        db.tools.find({"id": {"$in": list({r["tool_id"] for r in records})}},
+                      {"_id": 0, "id": 1, "name": 1, "category": 1}).to_list(None),
+        db.workers.find({"id": {"$in": list({r["worker_id"] for r in records})}},
+                        {"_id": 0, "id": 1, "name": 1, "department": 1}).to_list(None)
+    )
+    tool_usage, worker_usage = _rollup_increments(
+        records, {tool["id"]: tool for tool in tools}, {worker["id"]: worker for worker in workers}
+    )
+    await asyncio.gather(
+        _write_rollups(db.tool_usage_daily, _rollup_updates(tool_usage, "tool_id"), batch),
+        _write_rollups(db.worker_usage_daily, _rollup_updates(worker_usage, "worker_id"), batch)
+    )
+    await db.checkout_records.update_many({"rollup_batch": batch}, {"$set": {"rolled_up": True}})
+    return len(records)
+
+async def _roll_up_returned(checkout_ids: List[str]):
+    # Runs after the return response is sent; anything missed is left to the catch-up job
+    try:
+        await roll_up_checkouts(checkout_ids)
+    except Exception:
+        logger.exception("Failed to roll up returned checkouts")
+
+async def roll_up_pending_checkouts(batch_size: int = 1000) -> int:
+    """Catch-up job: roll up every returned checkout that is not in the rollups yet."""
+    rolled_up = 0
+    # Batches whose writer failed or died before marking them done
+    stale = datetime.utcnow() - timedelta(seconds=ROLLUP_CLAIM_TIMEOUT)
+    batches = await db.checkout_records.distinct("rollup_batch", {
+        "status": CheckoutStatus.RETURNED, "rolled_up": False, "rollup_claimed_at": {"$lt": stale}
+    })
+    for batch in batches:
+        await db.checkout_records.update_many(
+            {"rollup_batch": batch, "rolled_up": False}, {"$set": {"rollup_claimed_at": datetime.utcnow()}}
+        )
+        rolled_up += await _roll_up_batch(batch)
+    while True:
+        pending = await db.checkout_records.find(
+            {"status": CheckoutStatus.RETURNED, "rollup_batch": None}, {"_id": 0, "id": 1}
+        ).limit(batch_size).to_list(batch_size)
+        if not pending:
+            break
+        rolled_up += await roll_up_checkouts([record["id"] for record in pending])
+    if rolled_up:
+        logger.info(f"Rolled up {rolled_up} returned checkouts")
+    return rolled_up
+
+def _mean_hours(total_seconds: float, count: int) -> Optional[float]:
+    return round(total_seconds / count / 3600, 2) if count else None
+
+@api_router.get("/analytics", response_model=AnalyticsReport)
+async def get_analytics(
+    date_from: Optional[date] = Query(None, alias="from", description="First day to include (default: 29 days before 'to')"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last day to include (default: today)"),
+    top: int = Query(10, ge=1, le=100, description="Number of tools and borrowers per department to list")
+):
+    """Utilization (hours out / hours in the range), mean checkout duration and top borrowers,
+    aggregated from the daily rollups."""
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    day_range = {"day": {"$gte": _encode_value(date_from), "$lt": _encode_value(date_to + timedelta(days=1))}}
+    window_hours = ((date_to - date_from).days + 1) * 24
+    
+    tool_totals = {
+        "hours_out": {"$sum": {"$divide": ["$seconds_out", 3600]}},
+        "returns": {"$sum": "$returns"},
+        "returned_duration_seconds": {"$sum": "$returned_duration_seconds"},
+    }
+    categories, top_tools, departments, tools_per_category, outstanding = await asyncio.gather(
+        db.tool_usage_daily.aggregate([
+            {"$match": day_range},
+            {"$group": {"_id": "$category", **tool_totals}},
+        ]).to_list(None),
+        db.tool_usage_daily.aggregate([
+            {"$match": day_range},
+            {"$group": {
+                "_id": "$tool_id",
+                "tool_name": {"$last": "$tool_name"},
+                "category": {"$last": "$category"},
+                **tool_totals
+            }},
+            {"$sort": {"hours_out": -1, "_id": 1}},
+            {"$limit": top},
+        ]).to_list(None),
+        db.worker_usage_daily.aggregate([
+            {"$match": day_range},
+            {"$group": {
+                "_id": "$worker_id",
+                "worker_name": {"$last": "$worker_name"},
+                "department": {"$last": "$department"},
+                "checkouts": {"$sum": "$checkouts"},
+                "hours_out": {"$sum": {"$divide": ["$seconds_out", 3600]}},
+            }},
+            {"$sort": {"checkouts": -1, "hours_out": -1, "_id": 1}},
+            {"$group": {
+                "_id": "$department",
+                "checkouts": {"$sum": "$checkouts"},
+                "hours_out": {"$sum": "$hours_out"},
+                "borrowers": {"$push": {
+                    "worker_id": "$_id", "worker_name": "$worker_name",
+                    "checkouts": "$checkouts", "hours_out": "$hours_out"
+                }},
+            }},
+            {"$sort": {"checkouts": -1, "_id": 1}},
+        ]).to_list(None),
+        # Denominator of category utilization: every tool in the category, used or not
+        db.tools.aggregate([{"$group": {"_id": "$category", "count": {"$sum": 1}}}]).to_list(None),
+        db.checkout_records.count_documents({"status": {"$in": OUTSTANDING_STATUSES}})
+    )
+    tool_counts = {entry["_id"]: entry["count"] for entry in tools_per_category}
+    
+    report = AnalyticsReport(
+        date_from=date_from,
+        date_to=date_to,
+        outstanding_checkouts=outstanding,
+        categories=sorted((
+            CategoryUtilization(
+                category=entry["_id"] or "Uncategorized",
+                tools=tool_counts.get(entry["_id"], 0),
+                hours_out=round(entry["hours_out"], 2),
+                utilization=round(entry["hours_out"] / (window_hours * max(tool_counts.get(entry["_id"], 0), 1)), 4),
+                returns=entry["returns"],
+                mean_duration_hours=_mean_hours(entry["returned_duration_seconds"], entry["returns"])
+            )
+            for entry in categories
+        ), key=lambda category: -category.utilization),
+        top_tools=[
+            ToolUtilization(
+                tool_id=entry["_id"],
+                tool_name=entry["tool_name"],
+                category=entry["category"],
+                hours_out=round(entry["hours_out"], 2),
+                utilization=round(entry["hours_out"] / window_hours, 4),
+                returns=entry["returns"],
+                mean_duration_hours=_mean_hours(entry["returned_duration_seconds"], entry["returns"])
+            )
+            for entry in top_tools
+        ],
+        departments=[
+            DepartmentUsage(
+                department=entry["_id"] or "Unknown",
+                checkouts=entry["checkouts"],
+                hours_out=round(entry["hours_out"], 2),
+                top_borrowers=[
+                    Borrower(**{**borrower, "hours_out": round(borrower["hours_out"], 2)})
+                    for borrower in entry["borrowers"][:top]
+                ]
+            )
+            for entry in departments
+        ]
+    )
+    return Response(report.model_dump_json(), media_type="application/json")
+
+# Project planner. Reservations (outstanding checkouts and the windows of projects
+# that require a tool) are kept in memory as per-tool lists of half-open
+# [start, end) intervals sorted by start. The index is loaded once and then kept up
+# to date from the change events, including those forwarded by other processes;
+# without a bus to forward them it is also reloaded every RESERVATION_INDEX_TTL.
+OPEN_END = datetime.max
+
+def _day_start(value: date) -> datetime:
+    return datetime.combine(value, dt_time.min)
+
+class ReservationIndex:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._expires_at = 0.0
+        self._by_tool: Dict[str, List[tuple]] = {}  # tool_id -> [(start, end, kind, id, project_id)]
+        self._tools_by_owner: Dict[tuple, set] = {}  # (kind, id) -> tool ids it reserves
+        self._built = False
+        self._pending: Optional[list] = None  # events received while loading, replayed after
+        self._lock = asyncio.Lock()
+        self._rebuild: Optional[asyncio.Task] = None
+    
+    def _add(self, kind: str, owner_id: str, tool_id: str, start: datetime, end: datetime, project_id: Optional[str]):
+        bisect.insort(self._by_tool.setdefault(tool_id, []), (start, end, kind, owner_id, project_id))
+        self._tools_by_owner.setdefault((kind, owner_id), set()).add(tool_id)
+    
+    def _remove(self, kind: str, owner_id: str):
+        for tool_id in self._tools_by_owner.pop((kind, owner_id), ()):
+            intervals = [entry for entry in self._by_tool.get(tool_id, []) if entry[2:4] != (kind, owner_id)]
+            if intervals:
+                self._by_tool[tool_id] = intervals
+            else:
+                self._by_tool.pop(tool_id, None)
+    
+    def _add_checkout(self, record: CheckoutRecord):
+        self._remove("checkout", record.id)
+        end = _day_start(record.expected_return) + timedelta(days=1) if record.expected_return else OPEN_END
+        self._add("checkout", record.id, record.tool_id, record.checkout_date, end, record.project_id)
+    
+    def _set_project(self, project: Project):
+        self._remove("project", project.id)
+        if project.status == ProjectStatus.COMPLETED:
+            return
+        start = _day_start(project.start_date)
+        end = _day_start(project.end_date) + timedelta(days=1) if project.end_date else OPEN_END
+        for tool_id in set(project.required_tools):
+            self._add("project", project.id, tool_id, start, end, project.id)
+    
+    async def _load(self):
+        self._pending = []
+        started = time.monotonic()
+        try:
+            checkouts, projects = await asyncio.gather(
+                db.checkout_records.find(
+                    {"status": {"$in": OUTSTANDING_STATUSES}},
+                    {"_id": 0, "id": 1, "tool_id": 1, "project_id": 1, "worker_id": 1, "checkout_date": 1, "expected_return": 1}
+                ).to_list(None),
+                db.projects.find(
+                    {"status": {"$ne": ProjectStatus.COMPLETED}, "required_tools.0": {"$exists": True}}, {"_id": 0}
+                ).to_list(None)
+            )
+            by_tool, tools_by_owner = self._by_tool, self._tools_by_owner
+            self._by_tool, self._tools_by_owner = {}, {}
+            try:
+                for checkout in checkouts:
+                    self._add_checkout(CheckoutRecord.model_validate(checkout))
+                for project in projects:
+                    self._set_project(Project.model_validate(project))
+            except Exception:
+                self._by_tool, self._tools_by_owner = by_tool, tools_by_owner
+                raise
+            # Changes made while reading may or may not be in what was read; the updates are
+            # idempotent, so replaying them gives the same result either way
+            for event, data in self._pending:
+                self._update(event, data)
+            self._built = True
+            self._expires_at = started + self.ttl
+        finally:
+            self._pending = None
+    
+    def _current(self) -> bool:
+        return self._built and (not self.ttl or time.monotonic() < self._expires_at)
+    
+    async def ensure_built(self):
+        if self._current():
+            return
+        async with self._lock:
+            if not self._current():
+                await self._load()
+    
+    async def _reload(self):
+        try:
+            async with self._lock:
+                await self._load()
+        except Exception:
+            # Loaded again on the next query
+            self._built = False
+            logger.exception("Failed to reload the reservation index")
+        finally:
+            self._rebuild = None
+    
+    def apply(self, event: str, data):
+        """Update the index for a change event; bulk changes reload it in the background."""
+        if self._pending is not None:
+            self._pending.append((event, data))
+        elif not self._built:
+            return
+        if event == "resync":
+            if set(data["collections"]) & {"checkouts", "projects", "all"} and self._rebuild is None:
+                self._rebuild = asyncio.create_task(self._reload())
+        elif self._pending is None:
+            self._update(event, data)
+    
+    def _update(self, event: str, data):
+        if event == "checkout.created":
+            for record in data["checkouts"]:
+                self._add_checkout(record if isinstance(record, BaseModel) else CheckoutRecord.model_validate(record))
+        elif event == "checkout.returned":
+            for record in data["checkouts"]:
+                self._remove("checkout", record["id"])
+        elif event in ("project.created", "project.updated"):
+            self._set_project(data if isinstance(data, BaseModel) else Project.model_validate(data))
+        elif event == "tool.deleted":
+            self._by_tool.pop(data["id"], None)
+    
+    def conflicts(self, tool_ids: List[str], start: datetime, end: datetime,
+                  exclude_project_id: Optional[str] = None) -> Dict[str, List[Reservation]]:
+        now = datetime.utcnow()
+        found = {}
+        for tool_id in dict.fromkeys(tool_ids):
+            intervals = self._by_tool.get(tool_id)
+            if not intervals:
+                continue
+            # Only intervals starting before the window ends can overlap it
+            candidates = intervals[:bisect.bisect_left(intervals, (end,))]
+            reservations = []
+            for entry_start, entry_end, kind, owner_id, project_id in candidates:
+                # The excluded project's own window and the tools already issued to it
+                if exclude_project_id is not None and project_id == exclude_project_id:
+                    continue
+                # A checkout past its expected return stays out until it is returned
+                if kind == "checkout" and entry_end <= now:
+                    entry_end = OPEN_END
+                if entry_end > start:
+                    reservations.append(Reservation(
+                        kind=kind, id=owner_id, tool_id=tool_id, project_id=project_id, start=entry_start,
+                        end=None if entry_end == OPEN_END else entry_end
+                    ))
+            if reservations:
+                found[tool_id] = reservations
+        return found
+
+reservation_index = ReservationIndex(RESERVATION_INDEX_TTL)
+
+async def _conflict_report(tool_ids: List[str], start_date: date, end_date: Optional[date],
+                           exclude_project_id: Optional[str]) -> ConflictReport:
+    if end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    await reservation_index.ensure_built()
+    end = _day_start(end_date) + timedelta(days=1) if end_date else OPEN_END
+    found = reservation_index.conflicts(tool_ids, _day_start(start_date), end, exclude_project_id)
+    return ConflictReport(
+        start_date=start_date,
+        end_date=end_date,
+        conflicts=[ToolConflict(tool_id=tool_id, reservations=reservations) for tool_id, reservations in found.items()],
+        available=[tool_id for tool_id in dict.fromkeys(tool_ids) if tool_id not in found]
+    )
+
+@api_router.post("/planner/conflicts", response_model=ConflictReport)
+async def find_conflicts(query: ConflictQuery):
+    """Which of these tools are checked out or required by another project between the dates."""
+    return await _conflict_report(query.tool_ids, query.start_date, query.end_date, query.exclude_project_id)
+
+@api_router.get("/projects/{project_id}/conflicts", response_model=ConflictReport)
+async def get_project_conflicts(project_id: str):
+    project = await entity_cache.get("projects", project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project = Project.model_validate(project)
+    return await _conflict_report(project.required_tools, project.start_date, project.end_date, project.id)
+
+async def warm_up_reservation_index():
+    try:
+        await reservation_index.ensure_built()
+    except Exception:
+        # Built on first use instead
+        logger.exception("Failed to load the reservation index")
+
+# Reports. Checkout history in a window is loaded into columnar arrays and
+# aggregated with pandas in a worker thread (see reporting.py).
+QUARTER_PATTERN = re.compile(r"(\d{4})-?Q([1-4])")
+
+def _report_window(quarter: Optional[str], date_from: Optional[date], date_to: Optional[date]):
+    """Resolve the report window to [start, end) datetimes; defaults to the current quarter."""
+    if quarter:
+        match = QUARTER_PATTERN.fullmatch(quarter.upper())
+        if not match:
+            raise HTTPException(status_code=400, detail="quarter must look like 2024Q3")
+        start = datetime(int(match.group(1)), 3 * int(match.group(2)) - 2, 1)
+        return start, _add_months(start, 3)
+    if date_from or date_to:
+        if not (date_from and date_to):
+            raise HTTPException(status_code=400, detail="Give both 'from' and 'to', or a quarter")
+        if date_from > date_to:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+        return _encode_value(date_from), _encode_value(date_to + timedelta(days=1))
+    today = datetime.utcnow()
+    start = datetime(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    return start, _add_months(start, 3)
+
+async def _report_frame(start: datetime, end: datetime):
+    # Every checkout that was out at some point in the window: checked out before its
+    # end and not returned before its start. Archive months after the window can't hold any.
+    query = {
+        "checkout_date": {"$lt": end},
+        "$or": [{"actual_return": {"$gte": start}}, {"actual_return": None}]
+    }
+    last_partition = _archive_name(end - timedelta(microseconds=1))
+    partitions = [name for name in await _archive_partitions() if name <= last_partition]
+    frame = await reporting.load_checkouts([db.checkout_records, *(db[name] for name in partitions)], query)
+    return await asyncio.to_thread(reporting.add_checkout_metrics, frame, start, end, datetime.utcnow())
+
+def _report_response(frame, format: ReportFormat, filename: str) -> Response:
+    if format == ReportFormat.JSON:
+        return Response(frame.to_json(orient="records", date_format="iso"), media_type="application/json")
+    disposition = {"Content-Disposition": f'attachment; filename="{filename}.{format.value}"'}
+    if format == ReportFormat.PARQUET:
+        try:
+            body = reporting.to_parquet(frame)
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        return Response(body, media_type="application/vnd.apache.parquet", headers=disposition)
+    return StreamingResponse(reporting.iter_csv(frame), media_type="text/csv", headers=disposition)
+
+@api_router.get("/reports/project-usage")
+async def get_project_usage_report(
+    quarter: Optional[str] = Query(None, description="e.g. 2024Q3; defaults to the current quarter"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    cost: Optional[float] = Query(None, ge=0, description="Total cost to allocate by share of tool-hours"),
+    format: ReportFormat = ReportFormat.CSV
+):
+    """Tool-hours, checkouts, mean duration and overdue rate per project, for cost allocation."""
+    start, end = _report_window(quarter, date_from, date_to)
+    frame, projects = await asyncio.gather(
+        _report_frame(start, end),
+        db.projects.find({}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    )
+    usage = await asyncio.to_thread(
+        reporting.project_usage, frame, {project["id"]: project["name"] for project in projects}, cost
+    )
+    return _report_response(usage, format, f"project-usage-{start.date()}-{(end - timedelta(days=1)).date()}")
+
+@api_router.get("/reports/checkouts")
+async def get_checkout_report(
+    quarter: Optional[str] = Query(None, description="e.g. 2024Q3; defaults to the current quarter"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    format: ReportFormat = ReportFormat.CSV
+):
+    """Every checkout out during the window, with its duration, overdue flag and tool-hours in the window."""
+    start, end = _report_window(quarter, date_from, date_to)
+    rows = await asyncio.to_thread(reporting.checkout_rows, await _report_frame(start, end))
+    return _report_response(rows, format, f"checkouts-{start.date()}-{(end - timedelta(days=1)).date()}")
 
 # Dashboard endpoint
-@api_router.get("/dashboard", response_model=DashboardStats)
-async def get_dashboard():
-    # Get counts
-    total_tools = await db.tools.count_documents({})
-    available_tools = await db.tools.count_documents({"status": ToolStatus.AVAILABLE})
-    checked_out_tools = await db.tools.count_documents({"status": ToolStatus.CHECKED_OUT})
-    maintenance_tools = await db.tools.count_documents({"status": ToolStatus.IN_MAINTENANCE})
-    active_projects = await db.projects.count_documents({"status": ProjectStatus.ACTIVE})
-    total_workers = await db.workers.count_documents({})
-    
-    # Get recent checkouts
-    recent_checkouts = await db.checkout_records.find().sort("checkout_date", -1).limit(5).to_list(5)
-    recent_checkouts_with_details = []
+async def _compute_dashboard() -> bytes:
+    recent_pipeline = [
+        {"$sort": {"checkout_date": -1}},
+        {"$limit": 5},
+        *_lookup_one("tools", "tool_id", "tool"),
+        *_lookup_one("projects", "project_id", "project"),
+        *_lookup_one("workers", "worker_id", "worker"),
+        {"$addFields": {
+            "tool_name": {"$ifNull": ["$tool.name", "Unknown Tool"]},
+            "project_name": {"$ifNull": ["$project.name", "Unknown Project"]},
+            "worker_name": {"$ifNull": ["$worker.name", "Unknown Worker"]}
+        }},
+        # Only the public checkout fields, not the claims and rollup bookkeeping stored alongside them
+        {"$project": {
+            "_id": 0,
+            **{field: 1 for field in CheckoutRecord.model_fields},
+            "tool_name": 1, "project_name": 1, "worker_name": 1
+        }},
+    ]
+    # One round trip per collection, issued concurrently
+    tool_counts, active_projects, total_workers, recent_checkouts = await asyncio.gather(
+        db.tools.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list(None),
+        db.projects.count_documents({"status": ProjectStatus.ACTIVE}),
+        db.workers.count_documents({}),
+        db.checkout_records.aggregate(recent_pipeline).to_list(5)
+    )
+    counts_by_status = {entry["_id"]: entry["count"] for entry in tool_counts}
     
+    recent_checkouts_with_details = []
     for checkout in recent_checkouts:
-        tool = await db.tools.find_one({"id": checkout["tool_id"]})
-        project = await db.projects.find_one({"id": checkout["project_id"]})
-        worker = await db.workers.find_one({"id": checkout["worker_id"]})
-        
-        # Clean checkout data by removing MongoDB ObjectId
-        clean_checkout = {k: v for k, v in checkout.items() if k != '_id'}
-        
-        recent_checkouts_with_details.append({
-            "checkout": clean_checkout,
-            "tool_name": tool["name"] if tool else "Unknown Tool",
-            "project_name": project["name"] if project else "Unknown Project",
-            "worker_name": worker["name"] if worker else "Unknown Worker"
-        })
+        names = {key: checkout.pop(key) for key in ("tool_name", "project_name", "worker_name")}
+        recent_checkouts_with_details.append({"checkout": checkout, **names})
     
-    return DashboardStats(
-        total_tools=total_tools,
-        available_tools=available_tools,
-        checked_out_tools=checked_out_tools,
-        maintenance_tools=maintenance_tools,
+    stats = DashboardStats(
+        total_tools=sum(counts_by_status.values()),
+        available_tools=counts_by_status.get(ToolStatus.AVAILABLE, 0),
+        checked_out_tools=counts_by_status.get(ToolStatus.CHECKED_OUT, 0),
+        maintenance_tools=counts_by_status.get(ToolStatus.IN_MAINTENANCE, 0),
         active_projects=active_projects,
         total_workers=total_workers,
         recent_checkouts=recent_checkouts_with_details
     )
+    # Cache the serialized body so polls only pay for sending it
+    return stats.model_dump_json().encode()
+
+@api_router.get("/dashboard", response_model=DashboardStats,
+                dependencies=[_conditional_get("tools", "projects", "workers", "checkout_records")])
+async def get_dashboard():
+    # Served from a short-lived snapshot since every tool crib tablet polls this
+    return Response(await dashboard_cache.get(_compute_dashboard), media_type="application/json")
+
+# Live change feed
+async def _event_stream(queue: asyncio.Queue):
+    try:
+        # Reconnect quickly and start every client from the current counters
+        yield "retry: 3000\n\n"
+        yield f"event: dashboard\ndata: {(await dashboard_cache.get(_compute_dashboard)).decode()}\n\n"
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=EVENT_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        change_feed.unsubscribe(queue)
+
+@api_router.get("/events")
+async def stream_events():
+    """Server-Sent Events feed of changes made through this API.
+
+    Events: tool.created, tool.updated, tool.deleted, project.created, project.updated,
+    worker.created, checkout.created, checkout.returned, dashboard (fresh counters) and
+    resync (bulk changes; refetch the listed collections).
+    """
+    return StreamingResponse(
+        _event_stream(change_feed.subscribe()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Admin endpoints
+@api_router.post("/admin/migrate-dates")
+async def migrate_dates():
+    # One-off: convert date fields stored as ISO strings by older versions to BSON datetimes
+    migrated = await migrate_date_fields()
+    await _publish_change("resync", {"collections": ["all"]})
+    return {"migrated": migrated}
+
+@api_router.post("/admin/archive-checkouts")
+async def archive_checkouts():
+    # Run the archive job now instead of waiting for its next scheduled run
+    archived = await archive_returned_checkouts()
+    return {"archived": archived, "dropped": await drop_expired_archives(), "partitions": await _archive_partitions()}
+
+@api_router.get("/admin/cache")
+async def get_cache_stats():
+    return {"entities": await entity_cache.stats()}
+
+@api_router.get("/admin/slow-requests")
+async def get_slow_requests(limit: int = Query(20, ge=1, le=1000)):
+    return {
+        "threshold_ms": SLOW_REQUEST_THRESHOLD_MS,
+        "requests": request_profiler.recent(limit)
+    }
+
+@api_router.post("/admin/profile")
+async def profile_route(
+    route: str = Query(..., description="Route template, e.g. /api/tools/{tool_id}"),
+    requests: int = Query(10, ge=1, le=1000),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    timeout: float = Query(60, gt=0, le=600)
+):
+    """Sample stacks of the next `requests` requests to `route` and return them collapsed,
+    ready for flamegraph.pl or speedscope. Returns early with what was collected on timeout."""
+    if route not in {getattr(known, "path", None) for known in app.router.routes}:
+        raise HTTPException(status_code=404, detail=f"Unknown route {route}")
+    try:
+        sampler = request_profiler.arm(route, requests, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.wait_for(sampler.done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        request_profiler.disarm()
+    return Response(
+        sampler.collapsed(),
+        media_type="text/plain",
+        headers={"X-Profiled-Requests": str(sampler.finished)}
+    )
+
+def _index_key(key, weights: Optional[dict] = None) -> tuple:
+    """Key pattern of an index, with its text fields in one comparable entry.
+
+    A declared text index lists each field as "text"; index_information() reports
+    the same index as _fts/_ftsx with the fields in its weights instead.
+    """
+    key = list(key)
+    text_fields = tuple(sorted(weights or [field for field, kind in key if kind == "text"]))
+    normalized = []
+    for field, kind in key:
+        if field == "_fts" or (kind == "text" and not weights):
+            if ("$text", text_fields) not in normalized:
+                normalized.append(("$text", text_fields))
+        elif field != "_ftsx":
+            normalized.append((field, kind))
+    return tuple(normalized)
+
+@api_router.get("/admin/indexes")
+async def get_index_report():
+    # Compare the declared indexes with the ones that actually exist, by key pattern
+    report = {}
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        existing = await db[collection_name].index_information()
+        existing_keys = {_index_key(info["key"], info.get("weights")): name for name, info in existing.items()}
+        expected_keys = set()
+        missing = []
+        for index in indexes:
+            spec = index.document
+            keys = _index_key(spec["key"].items())
+            expected_keys.add(keys)
+            if keys not in existing_keys:
+                missing.append({"name": spec["name"], "key": dict(spec["key"])})
+        report[collection_name] = {
+            "expected": [index.document["name"] for index in indexes],
+            "existing": sorted(existing),
+            "missing": missing,
+            "unexpected": sorted(name for keys, name in existing_keys.items()
+                                 if keys not in expected_keys and name != "_id_")
+        }
+    return {
+        "ok": all(not entry["missing"] for entry in report.values()),
+        "collections": report
+    }
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint, outside /api like other infrastructure endpoints
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Profiled-Requests", "Content-Range", "Accept-Ranges"],
 )
+app.add_middleware(ETagMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
 
 # Configure logging
 logging.basicConfig(
@@ -459,6 +2752,128 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.exception_handler(ConnectionFailure)
+async def database_unavailable(request: Request, exc: ConnectionFailure):
+    # Raised when the pool stays exhausted past MONGO_WAIT_QUEUE_TIMEOUT_MS or no server is reachable
+    logger.warning(f"Database unavailable for {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database temporarily unavailable, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+async def warm_up_connections(count: int):
+    """Open `count` pooled connections up front so the first requests don't pay for handshakes."""
+    if count <= 0:
+        return
+    start = time.perf_counter()
+    # Concurrent commands each need their own connection, so the pool grows to `count`
+    results = await asyncio.gather(
+        *(db.command("ping") for _ in range(min(count, MONGO_MAX_POOL_SIZE))),
+        return_exceptions=True
+    )
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        logger.warning(f"Connection warm-up failed for {len(failures)} of {len(results)} connections: {failures[0]}")
+    else:
+        logger.info(f"Opened {len(results)} MongoDB connections in {time.perf_counter() - start:.2f}s")
+
+# Periodic background jobs, started and stopped with the app
+background_tasks: List[asyncio.Task] = []
+
+class JobLease:
+    """Elects the one server process that runs the periodic jobs.
+
+    Every process tries to take or renew the lease document a few times per TTL;
+    it is held by whoever renewed it last, until that process stops renewing it.
+    """
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.holder = uuid.uuid4().hex
+        self.held = asyncio.Event()
+    
+    async def _renew(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            await db.job_leases.find_one_and_update(
+                {"_id": self.name, "$or": [{"holder": self.holder}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": self.holder, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Held by another process: the upsert tried to insert a second lease document
+            return False
+        return True
+    
+    async def run(self):
+        while True:
+            try:
+                acquired = await self._renew()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Failed to renew job lease {self.name}")
+                acquired = False
+            if acquired and not self.held.is_set():
+                logger.info(f"Took job lease {self.name}, running periodic jobs in this process")
+            if acquired:
+                self.held.set()
+            else:
+                self.held.clear()
+            await asyncio.sleep(self.ttl / 3)
+    
+    async def release(self):
+        if self.held.is_set():
+            self.held.clear()
+            # Let another process take over now rather than after the TTL
+            await db.job_leases.delete_one({"_id": self.name, "holder": self.holder})
+
+job_lease = JobLease("periodic_jobs", JOB_LEASE_TTL)
+
+async def _run_periodically(name: str, interval: float, job):
+    while True:
+        await job_lease.held.wait()
+        try:
+            await job()
+        except Exception:
+            logger.exception(f"Background job {name} failed")
+        await asyncio.sleep(interval)
+
+@app.on_event("startup")
+async def startup_warm_up_connections():
+    await warm_up_connections(MONGO_WARMUP_CONNECTIONS)
+
+@app.on_event("startup")
+async def startup_ensure_indexes():
+    await ensure_indexes()
+
+@app.on_event("startup")
+async def startup_background_jobs():
+    background_tasks.append(asyncio.create_task(change_bus.run()))
+    background_tasks.append(asyncio.create_task(job_lease.run()))
+    background_tasks.append(asyncio.create_task(
+        _run_periodically("overdue_checkouts", OVERDUE_SCAN_INTERVAL, mark_overdue_checkouts)
+    ))
+    background_tasks.append(asyncio.create_task(
+        _run_periodically("calibration_due", CALIBRATION_SCAN_INTERVAL, mark_tools_needing_calibration)
+    ))
+    background_tasks.append(asyncio.create_task(
+        _run_periodically("checkout_archive", ARCHIVE_SCAN_INTERVAL, maintain_checkout_archive)
+    ))
+    background_tasks.append(asyncio.create_task(
+        _run_periodically("analytics_rollup", ROLLUP_SCAN_INTERVAL, roll_up_pending_checkouts)
+    ))
+    background_tasks.append(asyncio.create_task(warm_up_reservation_index()))
+
+@app.on_event("shutdown")
+async def shutdown_background_jobs():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await job_lease.release()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+API Load Benchmarks for Tool Room Inventory Management System
+Seeds a scratch database, drives the hot endpoints concurrently and reports latency percentiles and RPS as JSON
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+load_dotenv(ROOT_DIR / 'backend' / '.env')
+
+import server  # noqa: E402
+
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', f"{os.environ['DB_NAME']}_api_benchmark")
+SEED_BATCH_SIZE = 10000
+
+# Data sizes: tools, projects, workers, checkout records (a share of them still active)
+PROFILES = {
+    'smoke': {'tools': 1000, 'projects': 20, 'workers': 50, 'checkouts': 10000},
+    'small': {'tools': 10000, 'projects': 100, 'workers': 500, 'checkouts': 100000},
+    'large': {'tools': 100000, 'projects': 500, 'workers': 2000, 'checkouts': 1000000},
+}
+ACTIVE_SHARE = 0.05
+
+SCENARIOS = ['dashboard', 'checkouts_active', 'tools', 'checkout_return']
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ApiBenchmark:
+    def __init__(self, backend, sizes, concurrency, duration, url=None, seed=42):
+        self.backend = backend
+        self.sizes = sizes
+        self.concurrency = concurrency
+        self.duration = duration
+        self.url = url
+        self.random = random.Random(seed)
+        if backend == 'mongomock':
+            from mongomock_motor import AsyncMongoMockClient
+            self.client = AsyncMongoMockClient()
+        else:
+            self.client = server.AsyncIOMotorClient(os.environ['MONGO_URL'])
+        self.db = self.client[BENCH_DB_NAME]
+        # Point the API handlers at the scratch database when driving the app in-process
+        server.db = self.db
+        self.available_tool_ids = []
+        self.project_ids = []
+        self.worker_ids = []
+
+    async def reset_database(self):
+        await self.client.drop_database(BENCH_DB_NAME)
+
+    async def _insert(self, collection, documents):
+        for start in range(0, len(documents), SEED_BATCH_SIZE):
+            await self.db[collection].insert_many(documents[start:start + SEED_BATCH_SIZE], ordered=False)
+
+    async def seed(self):
+        """Seed tools, projects, workers and a checkout history; ACTIVE_SHARE of tools stay checked out"""
+        await self.reset_database()
+        now = datetime.utcnow()
+        sizes = self.sizes
+        self.project_ids = [str(uuid.uuid4()) for _ in range(sizes['projects'])]
+        self.worker_ids = [str(uuid.uuid4()) for _ in range(sizes['workers'])]
+        tool_ids = [str(uuid.uuid4()) for _ in range(sizes['tools'])]
+        active_count = min(int(sizes['tools'] * ACTIVE_SHARE), sizes['checkouts'])
+        active_tool_ids = tool_ids[:active_count]
+        self.available_tool_ids = tool_ids[active_count:]
+
+        await self._insert('projects', [
+            {
+                "id": project_id, "name": f"Project {i}", "start_date": datetime(2024, 1, 1), "status": "active",
+                "required_tools": [], "created_at": now, "updated_at": now
+            }
+            for i, project_id in enumerate(self.project_ids)
+        ])
+        await self._insert('workers', [
+            {
+                "id": worker_id, "name": f"Worker {i}", "email": f"worker{i}@example.com",
+                "department": f"Department {i % 10}", "created_at": now
+            }
+            for i, worker_id in enumerate(self.worker_ids)
+        ])
+        await self._insert('tools', [
+            {
+                "id": tool_id, "name": f"Tool {i}", "description": "Benchmark tool", "category": f"Category {i % 50}",
+                "serial_number": f"SN-{i:08d}", "status": "checked_out" if i < active_count else "available",
+                "image_url": None, "calibration_due": datetime(2030, 1, 1) - timedelta(days=i % 3000),
+                "location": f"Shelf {i % 200}", "created_at": now - timedelta(seconds=i), "updated_at": now
+            }
+            for i, tool_id in enumerate(tool_ids)
+        ])
+
+        # Checkout history in batches so 1M records never sit in memory at once
+        for start in range(0, sizes['checkouts'], SEED_BATCH_SIZE):
+            batch = []
+            for i in range(start, min(start + SEED_BATCH_SIZE, sizes['checkouts'])):
+                active = i < active_count
+                checkout_date = now - timedelta(minutes=i)
+                batch.append({
+                    "id": str(uuid.uuid4()),
+                    "tool_id": active_tool_ids[i] if active else self.random.choice(tool_ids),
+                    "project_id": self.random.choice(self.project_ids),
+                    "worker_id": self.random.choice(self.worker_ids),
+                    "checkout_date": checkout_date,
+                    # Dates are stored as midnight datetimes (see server._encode_value)
+                    "expected_return": datetime.combine(checkout_date.date() + timedelta(days=7), datetime.min.time()),
+                    "actual_return": None if active else checkout_date + timedelta(days=2),
+                    "status": "active" if active else "returned",
+                    "notes": None
+                })
+            await self.db.checkout_records.insert_many(batch, ordered=False)
+
+        if self.backend == 'mongo':
+            await server.ensure_indexes()
+
+    def http_client(self):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        if self.url:
+            return httpx.AsyncClient(base_url=self.url, limits=limits, timeout=60)
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=server.app), base_url="http://benchmark", limits=limits, timeout=60
+        )
+
+    async def _dashboard(self, client):
+        return [await client.get("/api/dashboard")]
+
+    async def _checkouts_active(self, client):
+        return [await client.get("/api/checkouts/active")]
+
+    async def _tools(self, client):
+        params = {"limit": 50}
+        choice = self.random.random()
+        if choice < 0.3:
+            params["status"] = "available"
+        elif choice < 0.5:
+            params["category"] = f"Category {self.random.randrange(50)}"
+        return [await client.get("/api/tools", params=params)]
+
+    async def _checkout_return(self, client):
+        # Each task takes its own tool from the pool so concurrent checkouts never contend
+        tool_id = self.available_tool_ids.pop()
+        try:
+            checkout = await client.post("/api/checkout", json={
+                "tool_id": tool_id,
+                "project_id": self.random.choice(self.project_ids),
+                "worker_id": self.random.choice(self.worker_ids)
+            })
+            if checkout.status_code != 200:
+                return [checkout]
+            returned = await client.post("/api/return", json={"checkout_id": checkout.json()["id"]})
+            return [checkout, returned]
+        finally:
+            self.available_tool_ids.insert(0, tool_id)
+
+    async def run_scenario(self, name):
+        operation = getattr(self, f"_{name}")
+        latencies, errors = [], 0
+        async with self.http_client() as client:
+            await operation(client)  # warm up caches and connections
+            deadline = time.perf_counter() + self.duration
+
+            async def loop():
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    responses = await operation(client)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    errors += sum(1 for response in responses if response.status_code >= 400)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(loop() for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / elapsed, 1),
+            "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+            "p50_ms": round(percentile(latencies, 0.50), 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 0.95), 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99), 2) if latencies else None,
+            "max_ms": round(latencies[-1], 2) if latencies else None,
+        }
+
+    async def run(self, scenarios, keep_data=False):
+        seed_start = time.perf_counter()
+        await self.seed()
+        seed_seconds = time.perf_counter() - seed_start
+        print(f"Seeded {self.sizes} in {seed_seconds:.1f}s", file=sys.stderr)
+        results = {}
+        try:
+            for name in scenarios:
+                print(f"Running {name} ({self.concurrency} concurrent, {self.duration}s)", file=sys.stderr)
+                results[name] = await self.run_scenario(name)
+        finally:
+            if not keep_data:
+                await self.reset_database()
+        return {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "backend": self.backend,
+            "target": self.url or "in-process",
+            "sizes": self.sizes,
+            "concurrency": self.concurrency,
+            "duration_s": self.duration,
+            "seed_s": round(seed_seconds, 1),
+            "scenarios": results,
+        }
+
+
+def compare(baseline, current, tolerance):
+    """Print per-scenario changes against a baseline report and return the scenarios that regressed"""
+    regressions = []
+    print(f"{'scenario':<18} | {'p95 ms':>18} | {'rps':>18}", file=sys.stderr)
+    print("-" * 60, file=sys.stderr)
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or not before.get("p95_ms") or not result.get("p95_ms"):
+            continue
+        p95_change = result["p95_ms"] / before["p95_ms"] - 1
+        rps_change = result["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        print(f"{name:<18} | {before['p95_ms']:>7.1f} -> {result['p95_ms']:>7.1f} | "
+              f"{before['rps']:>7.0f} -> {result['rps']:>7.0f}  ({p95_change:+.0%} p95, {rps_change:+.0%} rps)",
+              file=sys.stderr)
+        if p95_change > tolerance or rps_change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backend', choices=['mongo', 'mongomock'], default='mongo',
+                        help="seed the MongoDB at MONGO_URL, or an in-memory mongomock-motor stand-in")
+    parser.add_argument('--profile', choices=PROFILES, default='small')
+    parser.add_argument('--tools', type=int)
+    parser.add_argument('--checkouts', type=int)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20, help="seconds per scenario")
+    parser.add_argument('--url', help=f"drive a running server (started with DB_NAME={BENCH_DB_NAME}) "
+                                      "instead of the app in-process")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed p95/RPS regression against --compare before exiting with status 1")
+    parser.add_argument('--keep-data', action='store_true')
+    args = parser.parse_args()
+
+    if args.url and args.backend == 'mongomock':
+        parser.error("--url needs --backend mongo, since the server cannot see an in-process mongomock database")
+    sizes = dict(PROFILES[args.profile])
+    if args.tools:
+        sizes['tools'] = args.tools
+    if args.checkouts:
+        sizes['checkouts'] = args.checkouts
+
+    benchmark = ApiBenchmark(args.backend, sizes, args.concurrency, args.duration, url=args.url)
+    report = asyncio.run(benchmark.run(args.scenarios, keep_data=args.keep_data))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), report, args.tolerance)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Backend Performance Benchmarks for Tool Room Inventory Management System
+Seeds a scratch MongoDB database and measures round trips and latency of hot API handlers
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR / 'backend'))
+load_dotenv(ROOT_DIR / 'backend' / '.env')
+
+import server  # noqa: E402
+
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', f"{os.environ['DB_NAME']}_benchmark")
+
+SUITES = ['active', 'import', 'serialization']
+DATABASE_SUITES = {'active', 'import'}
+
+print(f"Benchmarking against: {os.environ['MONGO_URL']} (database: {BENCH_DB_NAME})")
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts every command the driver sends, i.e. MongoDB round trips"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+    def started(self, event):
+        with self._lock:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def build_tool_csv(rows):
+    """Build an in-memory CSV catalog of `rows` tools"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["name", "description", "category", "serial_number", "calibration_due", "location"])
+    for i in range(rows):
+        writer.writerow([f"Tool {i}", "Benchmark tool", f"Category {i % 20}", f"SN-{i:08d}", "2030-01-01", "Storage"])
+    return buffer.getvalue().encode()
+
+
+def build_tool_documents(n):
+    """Build n raw tool documents shaped like the ones stored in MongoDB"""
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()), "name": f"Tool {i}", "description": "Benchmark tool", "category": "Benchmark",
+            "serial_number": f"SN-{i:08d}", "status": "available", "image_url": None, "calibration_due": datetime(2030, 1, 1),
+            "location": "Storage", "created_at": now, "updated_at": now
+        }
+        for i in range(n)
+    ]
+
+
+class BackendBenchmark:
+    def __init__(self, sizes, repeats, import_rows):
+        self.sizes = sizes
+        self.repeats = repeats
+        self.import_rows = import_rows
+        self.counter = CommandCounter()
+        self.client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[self.counter])
+        self.db = self.client[BENCH_DB_NAME]
+        # Point the API handlers at the scratch database
+        server.db = self.db
+
+    async def reset_database(self):
+        await self.client.drop_database(BENCH_DB_NAME)
+
+    async def seed_active_checkouts(self, n):
+        """Seed n active checkouts, each referencing its own tool, project and worker"""
+        await self.reset_database()
+        now = datetime.utcnow()
+        tools, projects, workers, checkouts = [], [], [], []
+        for i in range(n):
+            tool_id, project_id, worker_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+            tools.append({
+                "id": tool_id, "name": f"Tool {i}", "category": "Benchmark", "status": "checked_out",
+                "location": "Storage", "created_at": now, "updated_at": now
+            })
+            projects.append({
+                "id": project_id, "name": f"Project {i}", "start_date": datetime(2024, 1, 1), "status": "active",
+                "required_tools": [tool_id], "created_at": now, "updated_at": now
+            })
+            workers.append({
+                "id": worker_id, "name": f"Worker {i}", "email": f"worker{i}@example.com",
+                "department": "Benchmark", "created_at": now
+            })
+            checkouts.append({
+                "id": str(uuid.uuid4()), "tool_id": tool_id, "project_id": project_id, "worker_id": worker_id,
+                "checkout_date": now, "status": "active"
+            })
+        if n:
+            await self.db.tools.insert_many(tools)
+            await self.db.projects.insert_many(projects)
+            await self.db.workers.insert_many(workers)
+            await self.db.checkout_records.insert_many(checkouts)
+
+    async def legacy_active_checkouts(self):
+        """The previous implementation: three find_one calls per active checkout"""
+        checkouts = await self.db.checkout_records.find({"status": "active"}).to_list(1000)
+        result = []
+        for checkout in checkouts:
+            tool = await self.db.tools.find_one({"id": checkout["tool_id"]})
+            project = await self.db.projects.find_one({"id": checkout["project_id"]})
+            worker = await self.db.workers.find_one({"id": checkout["worker_id"]})
+            result.append((checkout, tool, project, worker))
+        return result
+
+    async def measure(self, func):
+        """Return (round trips per call, median latency in ms) over the configured repeats"""
+        await func()  # warm up connections and server caches
+        timings = []
+        round_trips = 0
+        for _ in range(self.repeats):
+            self.counter.reset()
+            start = time.perf_counter()
+            await func()
+            timings.append((time.perf_counter() - start) * 1000)
+            round_trips = self.counter.count
+        return round_trips, statistics.median(timings)
+
+    async def bench_active_checkouts(self):
+        print("\n=== GET /api/checkouts/active ===")
+        print(f"{'N active':>10} | {'legacy trips':>12} | {'legacy ms':>10} | {'joined trips':>12} | {'joined ms':>10}")
+        print("-" * 66)
+        for n in self.sizes:
+            await self.seed_active_checkouts(n)
+            legacy_trips, legacy_ms = await self.measure(self.legacy_active_checkouts)
+            joined_trips, joined_ms = await self.measure(server.get_active_checkouts)
+            print(f"{n:>10} | {legacy_trips:>12} | {legacy_ms:>10.1f} | {joined_trips:>12} | {joined_ms:>10.1f}")
+
+    async def bench_tool_import_export(self):
+        rows = self.import_rows
+        print(f"\n=== Tool catalog import/export ({rows} rows) ===")
+        await self.reset_database()
+        payload = build_tool_csv(rows)
+
+        # Parse and validate only, to separate Python cost from MongoDB writes
+        start = time.perf_counter()
+        upload = UploadFile(file=io.BytesIO(payload), filename="tools.csv")
+        for _, row in server._iter_tool_rows(upload, server.DataFormat.CSV):
+            server._to_document(server.Tool(**server.ToolCreate(**row).dict()))
+        parse_seconds = time.perf_counter() - start
+        print(f"Parse + validate:  {rows / parse_seconds:>10.0f} rows/s ({parse_seconds:.2f}s)")
+
+        self.counter.reset()
+        start = time.perf_counter()
+        result = await server.import_tools(UploadFile(file=io.BytesIO(payload), filename="tools.csv"))
+        import_seconds = time.perf_counter() - start
+        print(f"Import:            {result.imported / import_seconds:>10.0f} rows/s ({import_seconds:.2f}s, "
+              f"{self.counter.count} round trips, {result.failed} failed)")
+
+        for file_format in server.DataFormat:
+            self.counter.reset()
+            start = time.perf_counter()
+            size = 0
+            async for chunk in server._export_tool_rows(file_format):
+                size += len(chunk)
+            export_seconds = time.perf_counter() - start
+            print(f"Export {file_format.value:<7}     {rows / export_seconds:>10.0f} rows/s ({export_seconds:.2f}s, "
+                  f"{size / 1e6:.1f} MB, {self.counter.count} round trips)")
+
+    async def bench_serialization(self):
+        """Per-document cost of turning raw documents into a JSON response body (no database)"""
+        n = 10000
+        print(f"\n=== Read path serialization ({n} tool documents) ===")
+        documents = build_tool_documents(n)
+        response_field = create_response_field(name="Response_get_tools", type_=List[server.Tool])
+
+        async def legacy():
+            # Strip _id, build Tool(**...) per document, then let FastAPI validate and encode the response
+            clean_tools = [{k: v for k, v in tool.items() if k != '_id'} for tool in documents]
+            content = await serialize_response(field=response_field, response_content=[server.Tool(**tool) for tool in clean_tools])
+            return server.JSONResponse(content).body
+
+        async def fast_path():
+            return server._json_response(List[server.Tool], documents).body
+
+        for label, func in (("legacy", legacy), ("fast path", fast_path)):
+            await func()
+            timings = []
+            for _ in range(self.repeats):
+                start = time.perf_counter()
+                await func()
+                timings.append(time.perf_counter() - start)
+            per_document_us = statistics.median(timings) / n * 1e6
+            print(f"{label:<10} {per_document_us:>8.2f} µs/document")
+
+    async def run_all(self, suites):
+        print("🚀 Starting Tool Room Inventory Backend Benchmarks")
+        print("=" * 66)
+        try:
+            if 'active' in suites:
+                await self.bench_active_checkouts()
+            if 'import' in suites:
+                await self.bench_tool_import_export()
+            if 'serialization' in suites:
+                await self.bench_serialization()
+        finally:
+            if DATABASE_SUITES & set(suites):
+                await self.reset_database()
+            self.client.close()
+        print("\n🏁 Benchmarks complete")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 800])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--import-rows', type=int, default=100000)
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=SUITES)
+    args = parser.parse_args()
+
+    benchmark = BackendBenchmark(args.sizes, args.repeats, args.import_rows)
+    asyncio.run(benchmark.run_all(args.suites))
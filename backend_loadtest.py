@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Multi-worker load test for Tool Room Inventory Management System
+Starts the API under gunicorn with increasing worker counts and measures read throughput
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+ROOT_DIR = Path(__file__).parent
+BACKEND_DIR = ROOT_DIR / 'backend'
+load_dotenv(BACKEND_DIR / '.env')
+
+LOAD_DB_NAME = os.getenv('LOAD_DB_NAME', f"{os.environ['DB_NAME']}_loadtest")
+
+# Read endpoints exercised by each client, in rotation
+ENDPOINTS = [
+    "/api/tools?limit=50",
+    "/api/dashboard",
+    "/api/checkouts/active",
+    "/api/tools/{tool_id}",
+    "/api/workers/{worker_id}",
+]
+
+
+def seed_database(n):
+    """Seed n tools, projects and workers with an active checkout for every other tool"""
+    client = MongoClient(os.environ['MONGO_URL'])
+    client.drop_database(LOAD_DB_NAME)
+    db = client[LOAD_DB_NAME]
+    now = datetime.utcnow()
+    tools, projects, workers, checkouts = [], [], [], []
+    for i in range(n):
+        tool_id, project_id, worker_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+        checked_out = i % 2 == 0
+        tools.append({
+            "id": tool_id, "name": f"Tool {i}", "category": f"Category {i % 20}",
+            "status": "checked_out" if checked_out else "available", "location": "Storage",
+            "created_at": now, "updated_at": now
+        })
+        projects.append({
+            "id": project_id, "name": f"Project {i}", "start_date": datetime(2024, 1, 1), "status": "active",
+            "required_tools": [tool_id], "created_at": now, "updated_at": now
+        })
+        workers.append({
+            "id": worker_id, "name": f"Worker {i}", "email": f"worker{i}@example.com",
+            "department": "Load test", "created_at": now
+        })
+        if checked_out:
+            checkouts.append({
+                "id": str(uuid.uuid4()), "tool_id": tool_id, "project_id": project_id, "worker_id": worker_id,
+                "checkout_date": now, "status": "active"
+            })
+    db.tools.insert_many(tools)
+    db.projects.insert_many(projects)
+    db.workers.insert_many(workers)
+    if checkouts:
+        db.checkout_records.insert_many(checkouts)
+    client.close()
+    return [tool["id"] for tool in tools], [worker["id"] for worker in workers]
+
+
+def start_server(workers, port):
+    env = dict(os.environ, DB_NAME=LOAD_DB_NAME, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/dashboard", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server with {workers} workers did not start")
+
+
+async def _drive(base_url, paths, connections, duration):
+    completed = errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def loop(offset):
+            nonlocal completed, errors
+            i = offset
+            while time.monotonic() < deadline:
+                response = await client.get(paths[i % len(paths)])
+                if response.status_code == 200:
+                    completed += 1
+                else:
+                    errors += 1
+                i += 1
+        await asyncio.gather(*(loop(offset) for offset in range(connections)))
+    return completed, errors
+
+
+def _client_process(base_url, paths, connections, duration, results):
+    results.put(asyncio.run(_drive(base_url, paths, connections, duration)))
+
+
+def measure(base_url, paths, clients, connections, duration):
+    """Run `clients` load-generating processes and return (requests/s, errors)"""
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_client_process, args=(base_url, paths, connections, duration, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(done for done, _ in totals) / duration, sum(errors for _, errors in totals)
+
+
+def main():
+    cpu_count = multiprocessing.cpu_count()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1))))
+    parser.add_argument('--clients', type=int, default=cpu_count, help="load-generating processes")
+    parser.add_argument('--connections', type=int, default=16, help="concurrent connections per client")
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--seed', type=int, default=1000, help="tools, projects and workers to seed")
+    parser.add_argument('--port', type=int, default=8011)
+    args = parser.parse_args()
+
+    print(f"Load testing against: {os.environ['MONGO_URL']} (database: {LOAD_DB_NAME})")
+    tool_ids, worker_ids = seed_database(args.seed)
+    paths = [
+        path.format(tool_id=tool_ids[i % len(tool_ids)], worker_id=worker_ids[i % len(worker_ids)])
+        for i in range(200) for path in ENDPOINTS
+    ]
+
+    print(f"{'workers':>8} | {'req/s':>10} | {'errors':>7} | {'speedup':>8} | {'efficiency':>10}")
+    print("-" * 55)
+    baseline = None
+    try:
+        for workers in args.workers:
+            server = start_server(workers, args.port)
+            try:
+                base_url = f"http://127.0.0.1:{args.port}"
+                measure(base_url, paths, args.clients, args.connections, min(args.duration, 3))  # warm up
+                rps, errors = measure(base_url, paths, args.clients, args.connections, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+            baseline = baseline or rps / workers
+            speedup = rps / baseline
+            print(f"{workers:>8} | {rps:>10.0f} | {errors:>7} | {speedup:>7.2f}x | {speedup / workers:>9.0%}")
+    finally:
+        MongoClient(os.environ['MONGO_URL']).drop_database(LOAD_DB_NAME)
+
+
+if __name__ == "__main__":
+    main()
@@ -39,6 +39,31 @@ class ToolRoomTester:
             print(f"❌ Backend not accessible: {e}")
             return False
     
+    def test_index_report(self):
+        """Test the index verification report"""
+        print("\n=== Testing Index Report ===")
+        
+        # Test GET /api/admin/indexes - every declared index exists after startup
+        response = self.session.get(f"{API_BASE}/admin/indexes")
+        if response.status_code != 200:
+            print(f"❌ Failed to get index report: {response.text}")
+            return False
+        report = response.json()
+        missing = {name: entry['missing'] for name, entry in report['collections'].items() if entry['missing']}
+        if report['ok'] and not missing:
+            print(f"✅ All declared indexes exist on {len(report['collections'])} collections")
+        else:
+            print(f"❌ Missing indexes: {missing}")
+            return False
+        
+        for name in ('tools', 'projects', 'workers', 'checkout_records'):
+            if name not in report['collections']:
+                print(f"❌ Index report does not cover {name}")
+                return False
+        print("✅ Index report covers tools, projects, workers and checkout records")
+        
+        return True
+    
     def test_tool_management(self):
         """Test Tool CRUD operations"""
         print("\n=== Testing Tool Management API ===")
@@ -394,6 +419,339 @@ class ToolRoomTester:
         
         return True
     
+    def test_pagination(self):
+        """Test keyset pagination cursors"""
+        print("\n=== Testing Pagination Cursors ===")
+        
+        # Test GET /api/tools?limit=2 - a full page carries the cursor of the next one
+        response = self.session.get(f"{API_BASE}/tools", params={"limit": 2})
+        if response.status_code != 200:
+            print(f"❌ Failed to get first page of tools: {response.text}")
+            return False
+        first_page = response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if len(first_page) == 2 and cursor:
+            print("✅ First page returned with X-Next-Cursor header")
+        else:
+            print(f"❌ Expected 2 tools and a cursor, got {len(first_page)} tools and cursor {cursor!r}")
+            return False
+        
+        # Test following the cursor
+        response = self.session.get(f"{API_BASE}/tools", params={"limit": 2, "after": cursor})
+        if response.status_code != 200:
+            print(f"❌ Failed to get next page of tools: {response.text}")
+            return False
+        first_ids = {tool['id'] for tool in first_page}
+        next_ids = {tool['id'] for tool in response.json()}
+        if next_ids and not first_ids & next_ids:
+            print(f"✅ Next page returned {len(next_ids)} different tools")
+        else:
+            print("❌ Next page is empty or repeats tools from the first page")
+            return False
+        
+        # Test GET /api/tools?stream=true&limit=2 - a streamed page could not carry its cursor
+        response = self.session.get(f"{API_BASE}/tools", params={"limit": 2, "stream": "true"})
+        if response.status_code == 400:
+            print("✅ Pagination validation working - rejects stream combined with limit")
+        else:
+            print(f"❌ stream with limit should return 400, got {response.status_code}")
+            return False
+        
+        # Test invalid cursor
+        response = self.session.get(f"{API_BASE}/tools", params={"limit": 2, "after": "not-a-cursor"})
+        if response.status_code == 400:
+            print("✅ Pagination validation working - rejects invalid cursor")
+        else:
+            print(f"❌ Invalid cursor should return 400, got {response.status_code}")
+            return False
+        
+        return True
+    
+    def test_conditional_get(self):
+        """Test ETag / If-None-Match conditional requests"""
+        print("\n=== Testing Conditional GET ===")
+        
+        tool = self.created_tools[2]
+        response = self.session.get(f"{API_BASE}/tools/{tool['id']}")
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            print(f"✅ Tool response carries ETag {etag}")
+        else:
+            print(f"❌ Expected 200 with an ETag, got {response.status_code} and {etag!r}")
+            return False
+        
+        # Test If-None-Match with the current ETag
+        response = self.session.get(f"{API_BASE}/tools/{tool['id']}", headers={"If-None-Match": etag})
+        if response.status_code == 304:
+            print("✅ Unchanged tool answered with 304 Not Modified")
+        else:
+            print(f"❌ Unchanged tool should return 304, got {response.status_code}")
+            return False
+        
+        # Test that an update invalidates the ETag
+        update_data = {
+            "name": tool['name'],
+            "description": tool['description'],
+            "category": tool['category'],
+            "serial_number": tool['serial_number'],
+            "location": "Electronics Lab - Cabinet 2"
+        }
+        response = self.session.put(f"{API_BASE}/tools/{tool['id']}", json=update_data)
+        if response.status_code != 200:
+            print(f"❌ Failed to update tool: {response.text}")
+            return False
+        self.created_tools[2] = response.json()
+        response = self.session.get(f"{API_BASE}/tools/{tool['id']}", headers={"If-None-Match": etag})
+        if response.status_code == 200 and response.json()['location'] == update_data['location']:
+            print("✅ Updated tool returned in full after its ETag changed")
+        else:
+            print(f"❌ Updated tool should return 200 with new data, got {response.status_code}")
+            return False
+        
+        return True
+    
+    def test_bulk_operations(self):
+        """Test bulk checkout and return with partial failures"""
+        print("\n=== Testing Bulk Checkout and Return ===")
+        
+        # Test POST /api/checkout/bulk - one available tool, one checked out, one unknown
+        items = [
+            {
+                "tool_id": tool_id,
+                "project_id": self.created_projects[1]['id'],
+                "worker_id": self.created_workers[2]['id'],
+                "expected_return": (date.today() + timedelta(days=3)).isoformat()
+            }
+            for tool_id in (self.created_tools[2]['id'], self.created_tools[1]['id'], str(uuid.uuid4()))
+        ]
+        response = self.session.post(f"{API_BASE}/checkout/bulk", json={"items": items})
+        if response.status_code != 200:
+            print(f"❌ Failed to bulk checkout: {response.text}")
+            return False
+        result = response.json()
+        details = [item['detail'] for item in result['results']]
+        if (result['succeeded'] == 1 and result['failed'] == 2 and result['results'][0]['success']
+                and details[1:] == ["Tool is not available for checkout", "Tool not found"]):
+            print("✅ Bulk checkout reported 1 success and 2 per-item failures")
+        else:
+            print(f"❌ Unexpected bulk checkout result: {result}")
+            return False
+        checkout_id = result['results'][0]['checkout_id']
+        
+        response = self.session.get(f"{API_BASE}/tools/{self.created_tools[2]['id']}")
+        if response.json()['status'] == "checked_out":
+            print("✅ Bulk checked out tool is marked checked out")
+        else:
+            print(f"❌ Bulk checked out tool has status {response.json()['status']}")
+            return False
+        
+        # Test POST /api/return/bulk - one outstanding checkout, one unknown
+        response = self.session.post(f"{API_BASE}/return/bulk", json={"checkout_ids": [checkout_id, str(uuid.uuid4())]})
+        if response.status_code != 200:
+            print(f"❌ Failed to bulk return: {response.text}")
+            return False
+        result = response.json()
+        if result['succeeded'] == 1 and result['results'][1]['detail'] == "Checkout record not found":
+            print("✅ Bulk return reported 1 success and 1 per-item failure")
+        else:
+            print(f"❌ Unexpected bulk return result: {result}")
+            return False
+        
+        # Test returning the same checkout again
+        response = self.session.post(f"{API_BASE}/return/bulk", json={"checkout_ids": [checkout_id]})
+        result = response.json()
+        if result['failed'] == 1 and result['results'][0]['detail'] == "Tool is already returned":
+            print("✅ Bulk return validation working - cannot return already returned tool")
+        else:
+            print(f"❌ Bulk return should reject an already returned checkout: {result}")
+            return False
+        
+        return True
+    
+    def test_project_kit_checkout(self):
+        """Test checking out a project's required tools in one call"""
+        print("\n=== Testing Project Kit Checkout ===")
+        
+        project = self.created_projects[0]
+        response = self.session.post(f"{API_BASE}/projects/{project['id']}/checkout", json={
+            "worker_id": self.created_workers[0]['id'],
+            "expected_return": (date.today() + timedelta(days=14)).isoformat(),
+            "notes": "Kit for manufacturing line upgrade"
+        })
+        if response.status_code != 200:
+            print(f"❌ Failed to check out project kit: {response.text}")
+            return False
+        result = response.json()
+        if result['succeeded'] == len(project['required_tools']) and result['failed'] == 0:
+            print(f"✅ Checked out {result['succeeded']} required tools for {project['name']}")
+        else:
+            print(f"❌ Unexpected kit checkout result: {result}")
+            return False
+        self.created_checkouts.extend(item['checkout'] for item in result['results'])
+        
+        # Test kit checkout for an unknown project
+        response = self.session.post(f"{API_BASE}/projects/{uuid.uuid4()}/checkout", json={
+            "worker_id": self.created_workers[0]['id']
+        })
+        if response.status_code == 404:
+            print("✅ Kit checkout validation working - rejects invalid project ID")
+        else:
+            print(f"❌ Kit checkout for an unknown project should return 404, got {response.status_code}")
+            return False
+        
+        return True
+    
+    def test_planner_conflicts(self):
+        """Test the tool availability planner"""
+        print("\n=== Testing Planner Conflicts ===")
+        
+        kit_tool_id = self.created_tools[0]['id']
+        free_tool_id = self.created_tools[2]['id']
+        query = {
+            "tool_ids": [kit_tool_id, free_tool_id],
+            "start_date": date.today().isoformat(),
+            "end_date": (date.today() + timedelta(days=7)).isoformat()
+        }
+        response = self.session.post(f"{API_BASE}/planner/conflicts", json=query)
+        if response.status_code != 200:
+            print(f"❌ Failed to query conflicts: {response.text}")
+            return False
+        report = response.json()
+        conflicting = [conflict['tool_id'] for conflict in report['conflicts']]
+        if conflicting == [kit_tool_id] and report['available'] == [free_tool_id]:
+            print("✅ Kit tool reported as conflicting, returned tool as available")
+        else:
+            print(f"❌ Unexpected conflict report: {report}")
+            return False
+        
+        # Test that a project's own window and checkouts are not conflicts for itself
+        response = self.session.get(f"{API_BASE}/projects/{self.created_projects[0]['id']}/conflicts")
+        if response.status_code == 200 and response.json()['conflicts'] == []:
+            print("✅ Project shows no conflicts with its own kit checkout")
+        else:
+            print(f"❌ Project should not conflict with itself: {response.text}")
+            return False
+        
+        # Test invalid date range
+        response = self.session.post(f"{API_BASE}/planner/conflicts", json={
+            **query, "end_date": (date.today() - timedelta(days=1)).isoformat()
+        })
+        if response.status_code == 400:
+            print("✅ Planner validation working - rejects end date before start date")
+        else:
+            print(f"❌ End date before start date should return 400, got {response.status_code}")
+            return False
+        
+        return True
+    
+    def test_overdue_checkouts(self):
+        """Test Overdue Checkouts API"""
+        print("\n=== Testing Overdue Checkouts API ===")
+        
+        # Overdue status is set by a periodic job, so only check what is listed
+        response = self.session.get(f"{API_BASE}/checkouts/overdue")
+        if response.status_code != 200:
+            print(f"❌ Failed to get overdue checkouts: {response.text}")
+            return False
+        overdue = response.json()
+        today = date.today().isoformat()
+        if all(item['checkout']['status'] == "overdue" and item['checkout']['expected_return'] < today
+               and all(key in item for key in ('tool', 'project', 'worker')) for item in overdue):
+            print(f"✅ Retrieved {len(overdue)} overdue checkouts, all past their expected return")
+        else:
+            print("❌ Overdue checkouts include records that are not overdue")
+            return False
+        
+        return True
+    
+    def test_checkout_history(self):
+        """Test Checkout History API"""
+        print("\n=== Testing Checkout History API ===")
+        
+        tool_id = self.created_tools[0]['id']
+        response = self.session.get(f"{API_BASE}/checkouts/history", params={"tool_id": tool_id, "limit": 1})
+        if response.status_code != 200:
+            print(f"❌ Failed to get checkout history: {response.text}")
+            return False
+        first_page = response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if len(first_page) == 1 and cursor:
+            print("✅ First page of history returned with X-Next-Cursor header")
+        else:
+            print(f"❌ Expected 1 record and a cursor, got {len(first_page)} records and cursor {cursor!r}")
+            return False
+        
+        response = self.session.get(f"{API_BASE}/checkouts/history", params={"tool_id": tool_id, "after": cursor})
+        history = first_page + response.json()
+        ids = [record['id'] for record in history]
+        dates = [record['checkout_date'] for record in history]
+        expected_ids = {checkout['id'] for checkout in self.created_checkouts if checkout['tool_id'] == tool_id}
+        if expected_ids <= set(ids) and len(ids) == len(set(ids)) and dates == sorted(dates):
+            print(f"✅ History lists the tool's {len(history)} checkouts oldest first")
+        else:
+            print(f"❌ Unexpected history for tool: {ids}")
+            return False
+        
+        # Test invalid date range
+        response = self.session.get(f"{API_BASE}/checkouts/history", params={
+            "from": date.today().isoformat(), "to": (date.today() - timedelta(days=1)).isoformat()
+        })
+        if response.status_code == 400:
+            print("✅ History validation working - rejects 'from' after 'to'")
+        else:
+            print(f"❌ 'from' after 'to' should return 400, got {response.status_code}")
+            return False
+        
+        return True
+    
+    def test_analytics(self):
+        """Test Utilization Analytics API"""
+        print("\n=== Testing Analytics API ===")
+        
+        response = self.session.get(f"{API_BASE}/analytics")
+        if response.status_code != 200:
+            print(f"❌ Failed to get analytics: {response.text}")
+            return False
+        analytics = response.json()
+        required_fields = ['date_from', 'date_to', 'outstanding_checkouts', 'categories', 'top_tools', 'departments']
+        missing_fields = [field for field in required_fields if field not in analytics]
+        if missing_fields:
+            print(f"❌ Analytics missing fields: {missing_fields}")
+            return False
+        print(f"✅ Analytics for {analytics['date_from']} to {analytics['date_to']}: "
+              f"{len(analytics['categories'])} categories, {analytics['outstanding_checkouts']} outstanding checkouts")
+        
+        if analytics['outstanding_checkouts'] >= 2:
+            print("✅ Outstanding checkouts include the ones made by these tests")
+        else:
+            print(f"❌ Expected at least 2 outstanding checkouts, got {analytics['outstanding_checkouts']}")
+            return False
+        
+        # Returned checkouts carry rollup bookkeeping that the dashboard must not show
+        response = self.session.get(f"{API_BASE}/dashboard")
+        if response.status_code != 200:
+            print(f"❌ Failed to get dashboard: {response.text}")
+            return False
+        checkout_fields = {'id', 'tool_id', 'project_id', 'worker_id', 'checkout_date',
+                           'expected_return', 'actual_return', 'status', 'notes'}
+        extra_fields = {field for item in response.json()['recent_checkouts'] for field in item['checkout']} - checkout_fields
+        if extra_fields:
+            print(f"❌ Dashboard recent checkouts expose internal fields: {sorted(extra_fields)}")
+            return False
+        print("✅ Dashboard recent checkouts show only checkout fields")
+        
+        # Test invalid date range
+        response = self.session.get(f"{API_BASE}/analytics", params={
+            "from": date.today().isoformat(), "to": (date.today() - timedelta(days=1)).isoformat()
+        })
+        if response.status_code == 400:
+            print("✅ Analytics validation working - rejects 'from' after 'to'")
+        else:
+            print(f"❌ 'from' after 'to' should return 400, got {response.status_code}")
+            return False
+        
+        return True
+    
     def test_dashboard_api(self):
         """Test Dashboard Statistics API"""
         print("\n=== Testing Dashboard Statistics API ===")
@@ -496,12 +854,21 @@ class ToolRoomTester:
         # Run tests in order
         tests = [
             ("Backend Health Check", self.test_health_check),
+            ("Index Report", self.test_index_report),
             ("Tool Management API", self.test_tool_management),
             ("Project Management API", self.test_project_management),
             ("Worker Management API", self.test_worker_management),
             ("Tool Checkout System", self.test_checkout_system),
             ("Tool Return System", self.test_return_system),
             ("Active Checkouts API", self.test_active_checkouts),
+            ("Pagination Cursors", self.test_pagination),
+            ("Conditional GET", self.test_conditional_get),
+            ("Bulk Checkout and Return", self.test_bulk_operations),
+            ("Project Kit Checkout", self.test_project_kit_checkout),
+            ("Planner Conflicts", self.test_planner_conflicts),
+            ("Overdue Checkouts API", self.test_overdue_checkouts),
+            ("Checkout History API", self.test_checkout_history),
+            ("Analytics API", self.test_analytics),
             ("Dashboard Statistics API", self.test_dashboard_api),
             ("Error Handling", self.test_error_handling)
         ]
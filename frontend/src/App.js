@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 import axios from 'axios';
 
@@ -9,6 +9,7 @@ function App() {
   const [activeTab, setActiveTab] = useState('dashboard');
   const [dashboardData, setDashboardData] = useState(null);
   const [tools, setTools] = useState([]);
+  const [availableTools, setAvailableTools] = useState([]);
   const [projects, setProjects] = useState([]);
   const [workers, setWorkers] = useState([]);
   const [activeCheckouts, setActiveCheckouts] = useState([]);
@@ -47,6 +48,17 @@ function App() {
     }
   };
 
+  const fetchAvailableTools = async () => {
+    try {
+      const response = await axios.get(`${API}/tools`, {
+        params: { status: 'available', fields: 'id,name,category', sort: 'name' }
+      });
+      setAvailableTools(response.data);
+    } catch (error) {
+      console.error('Error fetching available tools:', error);
+    }
+  };
+
   const fetchProjects = async () => {
     try {
       const response = await axios.get(`${API}/projects`);
@@ -81,8 +93,6 @@ function App() {
     try {
       await axios.post(`${API}/tools`, toolForm);
       setToolForm({ name: '', description: '', category: '', serial_number: '', location: '' });
-      fetchTools();
-      fetchDashboard();
     } catch (error) {
       console.error('Error adding tool:', error);
     }
@@ -95,8 +105,6 @@ function App() {
     try {
       await axios.post(`${API}/projects`, projectForm);
       setProjectForm({ name: '', description: '', start_date: '', end_date: '' });
-      fetchProjects();
-      fetchDashboard();
     } catch (error) {
       console.error('Error adding project:', error);
     }
@@ -109,8 +117,6 @@ function App() {
     try {
       await axios.post(`${API}/workers`, workerForm);
       setWorkerForm({ name: '', email: '', department: '', phone: '' });
-      fetchWorkers();
-      fetchDashboard();
     } catch (error) {
       console.error('Error adding worker:', error);
     }
@@ -123,9 +129,6 @@ function App() {
     try {
       await axios.post(`${API}/checkout`, checkoutForm);
       setCheckoutForm({ tool_id: '', project_id: '', worker_id: '', expected_return: '' });
-      fetchTools();
-      fetchActiveCheckouts();
-      fetchDashboard();
     } catch (error) {
       console.error('Error checking out tool:', error);
       alert('Error: ' + (error.response?.data?.detail || 'Failed to checkout tool'));
@@ -137,22 +140,98 @@ function App() {
     setLoading(true);
     try {
       await axios.post(`${API}/return`, { checkout_id: checkoutId });
-      fetchTools();
-      fetchActiveCheckouts();
-      fetchDashboard();
     } catch (error) {
       console.error('Error returning tool:', error);
     }
     setLoading(false);
   };
 
-  // Initial data fetch
-  useEffect(() => {
+  const fetchAll = () => {
     fetchDashboard();
     fetchTools();
+    fetchAvailableTools();
     fetchProjects();
     fetchWorkers();
     fetchActiveCheckouts();
+  };
+
+  // Initial data fetch
+  useEffect(() => {
+    fetchAll();
+  }, []);
+
+  // Latest lists for the change feed handlers, which are registered once
+  const toolsRef = useRef(tools);
+  const projectsRef = useRef(projects);
+  const workersRef = useRef(workers);
+  useEffect(() => { toolsRef.current = tools; }, [tools]);
+  useEffect(() => { projectsRef.current = projects; }, [projects]);
+  useEffect(() => { workersRef.current = workers; }, [workers]);
+
+  // Apply changes pushed by the server instead of refetching whole collections
+  useEffect(() => {
+    const source = new EventSource(`${API}/events`);
+    const on = (event, handler) => source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+    const upsert = (item) => (prev) => (
+      prev.some((x) => x.id === item.id) ? prev.map((x) => (x.id === item.id ? item : x)) : [...prev, item]
+    );
+    const setAvailable = (tool) => setAvailableTools((prev) => {
+      const rest = prev.filter((x) => x.id !== tool.id);
+      if (tool.status !== 'available') return rest;
+      return [...rest, { id: tool.id, name: tool.name, category: tool.category }]
+        .sort((a, b) => a.name.localeCompare(b.name));
+    });
+    const setToolStatus = (ids, status) => {
+      setTools((prev) => prev.map((tool) => (ids.has(tool.id) ? { ...tool, status } : tool)));
+      toolsRef.current.filter((tool) => ids.has(tool.id)).forEach((tool) => setAvailable({ ...tool, status }));
+    };
+
+    on('dashboard', setDashboardData);
+    on('tool.created', (tool) => { setTools(upsert(tool)); setAvailable(tool); });
+    on('tool.updated', (tool) => { setTools(upsert(tool)); setAvailable(tool); });
+    on('tool.deleted', ({ id }) => {
+      setTools((prev) => prev.filter((tool) => tool.id !== id));
+      setAvailableTools((prev) => prev.filter((tool) => tool.id !== id));
+    });
+    on('project.created', (project) => setProjects(upsert(project)));
+    on('project.updated', (project) => setProjects(upsert(project)));
+    on('worker.created', (worker) => setWorkers(upsert(worker)));
+    on('checkout.created', ({ checkouts }) => {
+      setToolStatus(new Set(checkouts.map((checkout) => checkout.tool_id)), 'checked_out');
+      setActiveCheckouts((prev) => [...prev, ...checkouts.map((checkout) => {
+        const tool = toolsRef.current.find((x) => x.id === checkout.tool_id);
+        return {
+          checkout,
+          tool: tool ? { ...tool, status: 'checked_out' } : null,
+          project: projectsRef.current.find((x) => x.id === checkout.project_id) || null,
+          worker: workersRef.current.find((x) => x.id === checkout.worker_id) || null
+        };
+      })]);
+    });
+    on('checkout.returned', ({ checkouts }) => {
+      const returned = new Set(checkouts.map((checkout) => checkout.id));
+      setToolStatus(new Set(checkouts.map((checkout) => checkout.tool_id)), 'available');
+      setActiveCheckouts((prev) => prev.filter((item) => !returned.has(item.checkout.id)));
+    });
+    on('resync', ({ collections }) => {
+      if (collections.includes('all')) {
+        fetchAll();
+        return;
+      }
+      if (collections.includes('tools')) {
+        fetchTools();
+        fetchAvailableTools();
+      }
+      if (collections.includes('checkouts')) fetchActiveCheckouts();
+    });
+
+    // Events sent while disconnected are lost, so catch up after every reconnect
+    let connected = false;
+    source.onopen = () => {
+      if (connected) fetchAll();
+      connected = true;
+    };
+    return () => source.close();
   }, []);
 
   const getStatusColor = (status) => {
@@ -435,6 +514,14 @@ function App() {
                     {tools.map((tool) => (
                       <tr key={tool.id}>
                         <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
+                          {tool.thumbnail_url && (
+                            <img
+                              src={`${BACKEND_URL}${tool.thumbnail_url}`}
+                              alt=""
+                              loading="lazy"
+                              className="inline-block h-8 w-8 rounded object-cover mr-3 align-middle"
+                            />
+                          )}
                           {tool.name}
                         </td>
                         <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
@@ -648,7 +735,7 @@ function App() {
                     required
                   >
                     <option value="">Select Tool</option>
-                    {tools.filter(tool => tool.status === 'available').map((tool) => (
+                    {availableTools.map((tool) => (
                       <option key={tool.id} value={tool.id}>
                         {tool.name} - {tool.category}
                       </option>